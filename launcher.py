@@ -7,12 +7,122 @@ import tkinter as tk
 from tkinter import ttk, scrolledtext, messagebox
 import subprocess
 import threading
+import queue
+import hashlib
 import os
+import shutil
 import sys
-import webbrowser
+from concurrent.futures import ThreadPoolExecutor, wait
 from pathlib import Path
 
+LOG_REFRESH_MS = 50  # GUI log refresh cadence (~20 Hz)
+LOG_MAX_LINES = 5000  # Oldest log lines are trimmed beyond this
+LOG_QUEUE_SIZE = 10000  # Pending log lines beyond this are dropped
+PIPE_READ_SIZE = 65536  # Bytes read per subprocess output chunk
+
+# Hash of the manifest each installer last succeeded with
+PY_DEPS_STAMP = "data/.deps.stamp"
+NODE_DEPS_STAMP = "node_modules/.deps.stamp"
+
+# On Windows, keep console children from flashing a window of their own
+if os.name == 'nt':
+    CREATION_FLAGS = subprocess.CREATE_NO_WINDOW | subprocess.CREATE_NEW_PROCESS_GROUP
+else:
+    CREATION_FLAGS = 0
+
+class KillOnCloseJob:
+    """Windows job object that takes its processes down with the launcher.
+    
+    Children assigned to the job are killed by the OS when the last handle
+    to it closes, even if the launcher itself is killed. On other platforms,
+    or if the job cannot be created, assign() does nothing.
+    """
+    JOB_OBJECT_LIMIT_KILL_ON_JOB_CLOSE = 0x2000
+    JOB_OBJECT_EXTENDED_LIMIT_INFORMATION_CLASS = 9
+    
+    def __init__(self):
+        self._handle = None
+        self._kernel32 = None
+        if os.name == 'nt':
+            try:
+                self._create()
+            except (OSError, AttributeError):
+                self._handle = None
+    
+    def _create(self):
+        import ctypes
+        from ctypes import wintypes
+        
+        class BasicLimitInformation(ctypes.Structure):
+            _fields_ = [
+                ("PerProcessUserTimeLimit", ctypes.c_int64),
+                ("PerJobUserTimeLimit", ctypes.c_int64),
+                ("LimitFlags", wintypes.DWORD),
+                ("MinimumWorkingSetSize", ctypes.c_size_t),
+                ("MaximumWorkingSetSize", ctypes.c_size_t),
+                ("ActiveProcessLimit", wintypes.DWORD),
+                ("Affinity", ctypes.c_size_t),
+                ("PriorityClass", wintypes.DWORD),
+                ("SchedulingClass", wintypes.DWORD),
+            ]
+        
+        class IoCounters(ctypes.Structure):
+            _fields_ = [
+                (name, ctypes.c_uint64) for name in (
+                    "ReadOperationCount", "WriteOperationCount", "OtherOperationCount",
+                    "ReadTransferCount", "WriteTransferCount", "OtherTransferCount",
+                )
+            ]
+        
+        class ExtendedLimitInformation(ctypes.Structure):
+            _fields_ = [
+                ("BasicLimitInformation", BasicLimitInformation),
+                ("IoInfo", IoCounters),
+                ("ProcessMemoryLimit", ctypes.c_size_t),
+                ("JobMemoryLimit", ctypes.c_size_t),
+                ("PeakProcessMemoryUsed", ctypes.c_size_t),
+                ("PeakJobMemoryUsed", ctypes.c_size_t),
+            ]
+        
+        kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+        kernel32.CreateJobObjectW.argtypes = (ctypes.c_void_p, wintypes.LPCWSTR)
+        kernel32.CreateJobObjectW.restype = wintypes.HANDLE
+        kernel32.SetInformationJobObject.argtypes = (
+            wintypes.HANDLE, ctypes.c_int, ctypes.c_void_p, wintypes.DWORD
+        )
+        kernel32.AssignProcessToJobObject.argtypes = (wintypes.HANDLE, wintypes.HANDLE)
+        
+        handle = kernel32.CreateJobObjectW(None, None)
+        if not handle:
+            raise ctypes.WinError(ctypes.get_last_error())
+        
+        info = ExtendedLimitInformation()
+        info.BasicLimitInformation.LimitFlags = self.JOB_OBJECT_LIMIT_KILL_ON_JOB_CLOSE
+        if not kernel32.SetInformationJobObject(
+            handle, self.JOB_OBJECT_EXTENDED_LIMIT_INFORMATION_CLASS,
+            ctypes.byref(info), ctypes.sizeof(info)
+        ):
+            error = ctypes.get_last_error()
+            kernel32.CloseHandle(handle)
+            raise ctypes.WinError(error)
+        
+        self._kernel32 = kernel32
+        self._handle = handle
+    
+    def assign(self, proc):
+        """Place a freshly spawned Popen in the job (its own children follow)."""
+        if self._handle:
+            self._kernel32.AssignProcessToJobObject(self._handle, int(proc._handle))
+
 class PlexSyncLauncher:
+    # Leaf directories only; mkdir(parents=True) creates assets/images
+    _DIRS = tuple(Path(p) for p in (
+        "data",
+        "assets/images/movie_image",
+        "assets/images/tv_image",
+        "assets/images/music_image",
+    ))
+    
     def __init__(self, root):
         self.root = root
         self.root.title("Plex Collection Sync Launcher")
@@ -29,9 +139,42 @@ class PlexSyncLauncher:
             )
             sys.exit(1)
         
+        # Resolve executables once instead of a PATH search on every spawn.
+        # A frozen launcher's sys.executable is the launcher itself, not Python.
+        if getattr(sys, "frozen", False):
+            self._python = shutil.which("python")
+        else:
+            self._python = sys.executable
+        self._node = shutil.which("node")
+        self._npm = shutil.which("npm") or shutil.which("npm.cmd") or "npm"
+        self._pip = [self._python or "python", "-m", "pip"]
+        
+        # Child processes stream their output unbuffered so the log stays live
+        self._child_env = {**os.environ, "PYTHONUNBUFFERED": "1", "NPM_CONFIG_PROGRESS": "false"}
+        
+        # Log lines are queued by worker threads and flushed on the Tk thread
+        self._log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+        # Widget and dialog calls from worker threads, run on the Tk thread the same way
+        self._ui_calls = queue.SimpleQueue()
+        
+        # Shared worker pool for the workflow, the parallel installers and
+        # their output readers (sized so nested submits never starve)
+        self.executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="plexsync")
+        # Set to ask running workflow steps to stop their child processes
+        self._cancel = threading.Event()
+        # Every live child process, so none outlive the launcher
+        self._children = set()
+        self._job = KillOnCloseJob()
+        # Dependency probes only need to succeed once per launcher session
+        self._deps_checked = False
+        self._deps_installed = False
+        # Guards against a second click starting a parallel workflow
+        self._workflow_running = False
+        
         self.setup_ui()
         self.sync_process = None
         self.backend_process = None
+        self.root.after(LOG_REFRESH_MS, self._drain_log)
         
     def setup_ui(self):
         # Header
@@ -92,6 +235,20 @@ class PlexSyncLauncher:
         )
         self.start_button.pack(side=tk.LEFT, padx=5)
         
+        self.abort_button = tk.Button(
+            button_frame,
+            text="Abort",
+            command=self.abort_workflow,
+            bg="#FF9800",
+            fg="white",
+            font=("Arial", 11, "bold"),
+            padx=20,
+            pady=10,
+            state=tk.DISABLED,
+            cursor="hand2"
+        )
+        self.abort_button.pack(side=tk.LEFT, padx=5)
+        
         self.stop_button = tk.Button(
             button_frame,
             text="Stop Server",
@@ -109,7 +266,7 @@ class PlexSyncLauncher:
         self.open_browser_button = tk.Button(
             button_frame,
             text="Open API",
-            command=lambda: webbrowser.open("http://localhost:3000/health"),
+            command=self.open_api,
             bg="#2196F3",
             fg="white",
             font=("Arial", 11, "bold"),
@@ -133,29 +290,117 @@ class PlexSyncLauncher:
         self.quit_button.pack(side=tk.RIGHT, padx=5)
         
     def log(self, message):
-        """Add message to log output."""
-        self.log_text.insert(tk.END, message + "\n")
-        self.log_text.see(tk.END)
-        self.root.update()
+        """Queue message for the log output (safe to call from any thread)."""
+        try:
+            self._log_queue.put_nowait(message + "\n")
+        except queue.Full:
+            # Drop rather than stall a runaway child's reader
+            pass
+    
+    def _on_ui(self, func, *args, **kwargs):
+        """Queue func(*args, **kwargs) to run on the Tk thread (safe to call from any thread)."""
+        self._ui_calls.put((func, args, kwargs))
+    
+    def _drain_log(self):
+        """Run queued UI calls, then flush queued log messages in a single insert."""
+        # Rescheduled first, so a modal dialog below doesn't pause the log
+        self.root.after(LOG_REFRESH_MS, self._drain_log)
+        try:
+            while True:
+                func, args, kwargs = self._ui_calls.get_nowait()
+                func(*args, **kwargs)
+        except queue.Empty:
+            pass
+        batch = []
+        try:
+            # Bounded so a producer refilling the queue can't starve Tk
+            for _ in range(LOG_QUEUE_SIZE):
+                batch.append(self._log_queue.get_nowait())
+        except queue.Empty:
+            pass
+        if batch:
+            self.log_text.insert(tk.END, "".join(batch))
+            # Trim from the top so the widget (and each insert) stays bounded
+            line_count = int(self.log_text.index('end-1c').split('.')[0])
+            if line_count > LOG_MAX_LINES:
+                self.log_text.delete('1.0', f'{line_count - LOG_MAX_LINES}.0')
+            self.log_text.see(tk.END)
+    
+    def _pump_stdout(self, proc):
+        """Forward a subprocess's output to the log until it closes.
+        
+        Reads raw blocks and splits lines here, avoiding the per-line decode
+        and locking of iterating a TextIOWrapper on chatty output.
+        """
+        fd = proc.stdout.fileno()
+        residual = b""
+        while True:
+            chunk = os.read(fd, PIPE_READ_SIZE)
+            if not chunk:
+                break
+            *lines, residual = (residual + chunk).split(b"\n")
+            if lines:
+                self.log("\n".join(line.decode('utf-8', 'replace').strip() for line in lines))
+        if residual:
+            self.log(residual.decode('utf-8', 'replace').strip())
+    
+    def _stream_subprocess(self, cmd):
+        """Run cmd, forwarding its output to the log until it exits.
+        
+        Output is pumped on the shared pool while this thread polls the
+        process, so a child stalled mid-line never blocks cancellation.
+        Returns the exit code, or None if the run was cancelled.
+        """
+        proc = subprocess.Popen(
+            cmd,
+            env=self._child_env,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            creationflags=CREATION_FLAGS
+        )
+        self._job.assign(proc)
+        self._children.add(proc)
+        try:
+            reader = self.executor.submit(self._pump_stdout, proc)
+            while True:
+                try:
+                    proc.wait(timeout=0.1)
+                    break
+                except subprocess.TimeoutExpired:
+                    if self._cancel.is_set():
+                        self._terminate(proc)
+                        return None
+            # Let the reader drain whatever output is still buffered
+            wait([reader], timeout=2)
+            return proc.returncode
+        finally:
+            self._children.discard(proc)
+    
+    @staticmethod
+    def _terminate(proc, timeout=2):
+        """Terminate a child process, killing it if it does not exit in time."""
+        if proc.poll() is not None:
+            return
+        proc.terminate()
+        try:
+            proc.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            proc.kill()
         
     def update_status(self, message, color="black"):
-        """Update status label."""
-        self.status_label.config(text=message, fg=color)
-        self.root.update()
+        """Update status label (safe to call from any thread)."""
+        self._on_ui(self.status_label.config, text=message, fg=color)
         
     def check_dependencies(self):
         """Check if Python and Node.js are available."""
-        try:
-            result = subprocess.run(
-                ["python", "--version"],
-                check=True,
-                capture_output=True,
-                timeout=5
-            )
-            python_version = result.stdout.decode().strip()
-            self.log(f"Found: {python_version}")
-        except (subprocess.CalledProcessError, FileNotFoundError, subprocess.TimeoutExpired):
-            messagebox.showerror(
+        if self._deps_checked:
+            return True
+        
+        # Paths were resolved at startup, so no interpreter needs to be spawned
+        python_path = self._python
+        if not python_path:
+            self._on_ui(
+                messagebox.showerror,
                 "Python Not Found",
                 "Python is not installed or not in PATH!\n\n"
                 "Please install Python 3.9+ from:\n"
@@ -163,18 +408,12 @@ class PlexSyncLauncher:
                 "Make sure to check 'Add Python to PATH' during installation."
             )
             return False
+        self.log(f"Found: {python_path}")
         
-        try:
-            result = subprocess.run(
-                ["node", "--version"],
-                check=True,
-                capture_output=True,
-                timeout=5
-            )
-            node_version = result.stdout.decode().strip()
-            self.log(f"Found: {node_version}")
-        except (subprocess.CalledProcessError, FileNotFoundError, subprocess.TimeoutExpired):
-            messagebox.showerror(
+        node_path = self._node
+        if not node_path:
+            self._on_ui(
+                messagebox.showerror,
                 "Node.js Not Found",
                 "Node.js is not installed or not in PATH!\n\n"
                 "Please install Node.js 18+ from:\n"
@@ -182,64 +421,116 @@ class PlexSyncLauncher:
                 "Restart your computer after installation."
             )
             return False
+        self.log(f"Found: {node_path}")
         
+        self._deps_checked = True
         return True
     
     def install_dependencies(self):
         """Install Python and Node.js dependencies."""
+        if self._deps_installed:
+            return True
+        
+        # pip and npm are independent, so run them side by side
+        pip_job = self.executor.submit(self._pip_install)
+        npm_job = self.executor.submit(self._npm_install)
+        wait([pip_job, npm_job])
+        if not (pip_job.result() and npm_job.result()):
+            return False
+        
+        self._deps_installed = True
+        return True
+    
+    def _pip_install(self):
+        """Install Python dependencies unless requirements.txt is unchanged."""
         self.log("Checking Python dependencies...")
+        py_digest = self._manifest_hash("requirements.txt")
+        py_stamp = self._read_stamp(PY_DEPS_STAMP)
         try:
-            result = subprocess.run(
-                ["python", "-c", "import plexapi"],
-                capture_output=True
-            )
-            if result.returncode != 0:
-                self.log("Installing Python dependencies...")
-                proc = subprocess.Popen(
-                    ["pip", "install", "-r", "requirements.txt"],
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.STDOUT,
+            if py_digest is not None and py_stamp == py_digest:
+                self.log("Python dependencies up to date")
+                return True
+            
+            # Only probe plexapi when there is no install stamp
+            if py_stamp is None:
+                plexapi_probe = subprocess.run(
+                    [self._python, "-c", "import plexapi"],
+                    capture_output=True,
                     text=True,
-                    bufsize=1
+                    encoding='utf-8',
+                    errors='replace',
+                    env=self._child_env,
+                    creationflags=CREATION_FLAGS
                 )
-                for line in proc.stdout:
-                    self.log(line.strip())
-                proc.wait()
+                if plexapi_probe.returncode == 0:
+                    return True
+            
+            # No plexapi, or requirements.txt changed since the last install
+            self.log("Installing Python dependencies...")
+            returncode = self._stream_subprocess(self._pip + ["install", "-r", "requirements.txt"])
+            if returncode is None:
+                return False
+            if returncode == 0:
+                self._write_stamp(PY_DEPS_STAMP, py_digest)
         except Exception as e:
             self.log(f"Error installing Python dependencies: {e}")
             return False
-        
+        return True
+    
+    def _npm_install(self):
+        """Install Node.js dependencies if node_modules is missing or stale."""
         self.log("Checking Node.js dependencies...")
-        if not Path("node_modules").exists():
-            self.log("Installing Node.js dependencies...")
-            try:
-                proc = subprocess.Popen(
-                    ["npm", "install"],
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.STDOUT,
-                    text=True,
-                    bufsize=1
-                )
-                for line in proc.stdout:
-                    self.log(line.strip())
-                proc.wait()
-            except Exception as e:
-                self.log(f"Error installing Node.js dependencies: {e}")
-                return False
+        node_manifest = "package-lock.json" if Path("package-lock.json").exists() else "package.json"
+        node_digest = self._manifest_hash(node_manifest)
+        node_stamp = self._read_stamp(NODE_DEPS_STAMP)
+        node_stale = node_stamp is not None and node_stamp != node_digest
+        if Path("node_modules").exists() and not node_stale:
+            return True
         
+        self.log("Installing Node.js dependencies...")
+        try:
+            returncode = self._stream_subprocess([self._npm, "install"])
+            if returncode is None:
+                return False
+            if returncode == 0:
+                self._write_stamp(NODE_DEPS_STAMP, node_digest)
+        except Exception as e:
+            self.log(f"Error installing Node.js dependencies: {e}")
+            return False
         return True
     
+    @staticmethod
+    def _manifest_hash(manifest):
+        """Return a fingerprint of a dependency manifest, or None if it is missing."""
+        try:
+            return hashlib.blake2b(Path(manifest).read_bytes(), digest_size=16).hexdigest()
+        except OSError:
+            return None
+    
+    @staticmethod
+    def _read_stamp(stamp):
+        """Return the manifest hash recorded by the last successful install."""
+        try:
+            return Path(stamp).read_text().strip()
+        except OSError:
+            return None
+    
+    @staticmethod
+    def _write_stamp(stamp, digest):
+        """Record the manifest hash after a successful install."""
+        if digest is None:
+            return
+        stamp = Path(stamp)
+        stamp.parent.mkdir(parents=True, exist_ok=True)
+        stamp.write_text(digest)
+    
     def create_directories(self):
         """Create necessary directories."""
-        dirs = [
-            "data",
-            "assets/images",
-            "assets/images/movie_image",
-            "assets/images/tv_image",
-            "assets/images/music_image"
-        ]
-        for dir_path in dirs:
-            Path(dir_path).mkdir(parents=True, exist_ok=True)
+        # exists() skips mkdir's ancestor walk in the common (already created) case
+        list(self.executor.map(
+            lambda p: p.exists() or p.mkdir(parents=True, exist_ok=True),
+            self._DIRS
+        ))
     
     def run_sync(self):
         """Run the sync script."""
@@ -248,20 +539,12 @@ class PlexSyncLauncher:
         self.log("=" * 50)
         
         try:
-            proc = subprocess.Popen(
-                ["python", "plex_sync.py"],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                text=True,
-                bufsize=1
-            )
-            
-            for line in proc.stdout:
-                self.log(line.strip())
+            returncode = self._stream_subprocess([self._python, "-u", "plex_sync.py"])
             
-            proc.wait()
-            
-            if proc.returncode == 0:
+            if returncode is None:
+                self.log("Sync cancelled")
+                return False
+            elif returncode == 0:
                 self.log("=" * 50)
                 self.log("Sync completed successfully!")
                 self.log("=" * 50)
@@ -284,24 +567,21 @@ class PlexSyncLauncher:
         
         try:
             self.backend_process = subprocess.Popen(
-                ["node", "server.js"],
+                [self._node, "server.js"],
                 stdout=subprocess.PIPE,
                 stderr=subprocess.STDOUT,
-                text=True,
-                bufsize=1
+                creationflags=CREATION_FLAGS
             )
+            self._job.assign(self.backend_process)
             
-            # Start thread to read output
-            def read_output():
-                if self.backend_process:
-                    for line in self.backend_process.stdout:
-                        self.log(line.strip())
+            self._children.add(self.backend_process)
             
-            threading.Thread(target=read_output, daemon=True).start()
+            # Read output on the shared pool
+            self.executor.submit(self._pump_stdout, self.backend_process)
             
             self.update_status("Server running on http://localhost:3000", "green")
-            self.start_button.config(state=tk.DISABLED)
-            self.stop_button.config(state=tk.NORMAL)
+            self._on_ui(self.start_button.config, state=tk.DISABLED)
+            self._on_ui(self.stop_button.config, state=tk.NORMAL)
             return True
         except Exception as e:
             self.log(f"Error starting backend: {e}")
@@ -309,14 +589,30 @@ class PlexSyncLauncher:
     
     def start_all(self):
         """Start sync and server in sequence."""
+        if self._workflow_running:
+            return
+        self._workflow_running = True
+        self._cancel.clear()
         self.start_button.config(state=tk.DISABLED)
+        self.abort_button.config(state=tk.NORMAL)
         self.progress.start()
         
+        def aborted():
+            """Reset the UI if the user aborted; returns True when aborted."""
+            if not self._cancel.is_set():
+                return False
+            self._on_ui(self.progress.stop)
+            self.update_status("Aborted", "red")
+            self._on_ui(self.start_button.config, state=tk.NORMAL)
+            return True
+        
+        # run() is on a worker thread: every widget and dialog call goes through _on_ui
         def run():
             try:
                 # Check dependencies
                 if not self.check_dependencies():
-                    messagebox.showerror(
+                    self._on_ui(
+                        messagebox.showerror,
                         "Dependencies Missing",
                         "Python or Node.js not found in PATH!\n\n"
                         "Please install:\n"
@@ -328,7 +624,9 @@ class PlexSyncLauncher:
                 # Install dependencies
                 self.update_status("Installing dependencies...", "blue")
                 if not self.install_dependencies():
-                    messagebox.showerror("Error", "Failed to install dependencies!")
+                    if aborted():
+                        return
+                    self._on_ui(messagebox.showerror, "Error", "Failed to install dependencies!")
                     return
                 
                 # Create directories
@@ -338,28 +636,46 @@ class PlexSyncLauncher:
                 # Run sync
                 self.update_status("Running sync...", "blue")
                 self.run_sync()
+                if aborted():
+                    return
                 
                 # Start backend
                 self.update_status("Starting server...", "blue")
                 self.start_backend()
                 
-                self.progress.stop()
-                messagebox.showinfo(
+                self._on_ui(self.progress.stop)
+                self._on_ui(
+                    messagebox.showinfo,
                     "Success",
                     "Sync completed and server started!\n\n"
                     "API available at: http://localhost:3000"
                 )
             except Exception as e:
-                self.progress.stop()
-                messagebox.showerror("Error", f"An error occurred: {e}")
-                self.start_button.config(state=tk.NORMAL)
+                self._on_ui(self.progress.stop)
+                self._on_ui(messagebox.showerror, "Error", f"An error occurred: {e}")
+                self._on_ui(self.start_button.config, state=tk.NORMAL)
+            finally:
+                self._workflow_running = False
+                self._on_ui(self.abort_button.config, state=tk.DISABLED)
         
-        threading.Thread(target=run, daemon=True).start()
+        self.executor.submit(run)
+    
+    def abort_workflow(self):
+        """Ask the running workflow to stop and terminate its current step."""
+        if self._workflow_running and not self._cancel.is_set():
+            self.log("Aborting...")
+            self._cancel.set()
+    
+    def open_api(self):
+        """Open the backend health endpoint in the default browser."""
+        import webbrowser  # Deferred: only needed on click, keeps GUI startup lean
+        webbrowser.open("http://localhost:3000/health")
     
     def stop_backend(self):
         """Stop the backend server."""
         if self.backend_process:
             self.backend_process.terminate()
+            self._children.discard(self.backend_process)
             self.backend_process = None
             self.update_status("Server stopped", "red")
             self.start_button.config(state=tk.NORMAL)
@@ -368,8 +684,14 @@ class PlexSyncLauncher:
     
     def quit_app(self):
         """Quit the application."""
+        self._cancel.set()
         if self.backend_process:
             self.stop_backend()
+        # Bound shutdown time: no pip/npm/sync child survives the launcher
+        for proc in list(self._children):
+            self._terminate(proc)
+        self._children.clear()
+        self.executor.shutdown(wait=False, cancel_futures=True)
         self.root.quit()
         self.root.destroy()
 
@@ -23,12 +23,20 @@ CLI Usage:
 import os
 import sqlite3
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import time
 import hashlib
+import struct
 import logging
 import argparse
+import multiprocessing
+import threading
+from collections import defaultdict, deque
+from contextlib import contextmanager
 from datetime import datetime
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from functools import lru_cache
 from plexapi.server import PlexServer
 from plexapi.library import LibrarySection
 from plexapi.video import Movie, Show, Season, Episode
@@ -36,6 +44,13 @@ from plexapi.audio import Artist, Album, Track
 from PIL import Image
 import io
 
+# Async image downloader (listed in requirements.txt; falls back to a thread pool without aiohttp)
+try:
+    import asyncio
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
 # Load environment variables from .env file if it exists
 try:
     from dotenv import load_dotenv
@@ -58,7 +73,16 @@ IMAGE_FOLDERS = {
 # Global settings (can be overridden by CLI args)
 USE_PARALLEL = True
 DOWNLOAD_IMAGES = True
-SCHEMA_VERSION = 3  # Increment when schema changes
+SCHEMA_VERSION = 12  # Increment when schema changes
+LIBRARY_PAGE_SIZE = 200  # Items per request when listing a library
+SEASON_WORKERS = 8  # Seasons of a show processed concurrently
+SHOW_FETCH_WORKERS = 8  # Shows whose seasons/episodes are fetched from Plex concurrently
+BATCH_SIZE = 5000  # Rows per executemany call when writing a library
+# Generated columns need SQLite 3.31, UPDATE ... FROM (TV rollup) 3.33 and
+# ALTER TABLE DROP COLUMN (the *Human column migrations) 3.35
+MIN_SQLITE_VERSION = (3, 35, 0)
+
+logger = logging.getLogger(__name__)
 
 def setup_logging(verbose=False, log_file=None):
     """Setup logging configuration."""
@@ -75,13 +99,15 @@ def setup_logging(verbose=False, log_file=None):
         datefmt='%Y-%m-%d %H:%M:%S',
         handlers=handlers
     )
-    return logging.getLogger(__name__)
+    return logger
 
 def calculate_media_hash(size_bytes, duration, codec, resolution, container, title, year):
     """Calculate a hash fingerprint for media to detect changes."""
-    # Create a string representation of key attributes
-    hash_string = f"{size_bytes}|{duration}|{codec}|{resolution}|{container}|{title}|{year}"
-    return hashlib.md5(hash_string.encode('utf-8')).hexdigest()
+    # Numbers are packed as binary, strings joined once; no per-field formatting
+    key = struct.pack("<qqq", size_bytes or 0, duration or 0, year or 0)
+    key += "|".join((codec or "", resolution or "", container or "", title or "")).encode('utf-8')
+    # Change detection only, so a short non-cryptographic digest is plenty
+    return hashlib.blake2b(key, digest_size=8, usedforsecurity=False).hexdigest()
 
 def parse_args():
     """Parse command line arguments."""
@@ -111,6 +137,11 @@ def parse_args():
         action='store_true',
         help='Skip image downloads'
     )
+    parser.add_argument(
+        '--vacuum',
+        action='store_true',
+        help='VACUUM the database after syncing to reclaim free space (rewrites the whole file)'
+    )
     parser.add_argument(
         '--verbose', '-v',
         action='store_true',
@@ -140,11 +171,15 @@ def validate_rating_key(rating_key):
 def human_readable_size(total_bytes):
     """Convert bytes to human-readable format."""
     if total_bytes >= 1_000_000_000_000:
-        return f"{total_bytes / 1_000_000_000_000:.2f} TB"
+        unit, scale = "TB", 1_000_000_000_000
     elif total_bytes >= 1_000_000_000:
-        return f"{total_bytes / 1_000_000_000:.2f} GB"
+        unit, scale = "GB", 1_000_000_000
     else:
-        return f"{total_bytes / 1_000_000:.2f} MB"
+        unit, scale = "MB", 1_000_000
+    # Hundredths rounded half up in integer math, so sql_human_size() matches exactly
+    # (float formatting differs between Python and SQLite's printf on halves)
+    hundredths = (total_bytes * 100 + scale // 2) // scale
+    return f"{hundredths // 100}.{hundredths % 100:02d} {unit}"
 
 def human_readable_duration(total_milliseconds):
     """Convert milliseconds to human-readable duration in full integer minutes."""
@@ -155,105 +190,130 @@ def human_readable_duration(total_milliseconds):
         total_minutes = 1
     return f"{total_minutes} min{'s' if total_minutes != 1 else ''}"
 
+def sql_human_size(expr):
+    """SQL expression equivalent of human_readable_size() for a byte count."""
+    total_bytes = f"CAST({expr} AS INTEGER)"
+    
+    def scaled(unit, scale):
+        hundredths = f"(({total_bytes} * 100 + {scale // 2}) / {scale})"
+        return f"printf('%d.%02d {unit}', {hundredths} / 100, {hundredths} % 100)"
+    
+    return (
+        f"CASE WHEN {total_bytes} >= 1000000000000 THEN {scaled('TB', 1_000_000_000_000)} "
+        f"WHEN {total_bytes} >= 1000000000 THEN {scaled('GB', 1_000_000_000)} "
+        f"ELSE {scaled('MB', 1_000_000)} END"
+    )
+
+def sql_human_duration(expr):
+    """SQL expression equivalent of human_readable_duration() for milliseconds."""
+    seconds = f"(CAST({expr} AS INTEGER) / 1000)"
+    # round(seconds / 60) with Python's round-half-to-even, but at least 1 if there's any duration
+    minutes = (
+        f"MAX(CASE WHEN {seconds} % 60 = 30 THEN {seconds} / 60 + ({seconds} / 60) % 2 "
+        f"ELSE ({seconds} + 30) / 60 END, {seconds} > 0)"
+    )
+    return f"({minutes} || CASE WHEN {minutes} != 1 THEN ' mins' ELSE ' min' END)"
+
+# Plex's common videoResolution values; anything else falls through to the generic rules
+_RES_MAP = {"4k": "2160p", "1080": "1080p", "720": "720p", "576": "576p", "480": "480p", "sd": "sd"}
+
+@lru_cache(maxsize=64)
 def format_resolution(resolution):
     """Format resolution string."""
     if resolution is None:
         return None
     resolution = resolution.lower()
-    if resolution == "4k":
-        return "2160p"
-    elif resolution.isdigit():
-        return f"{resolution}p"
-    return resolution
+    formatted = _RES_MAP.get(resolution)
+    if formatted:
+        return formatted
+    return f"{resolution}p" if resolution.isdigit() else resolution
 
+@lru_cache(maxsize=64)
 def format_codec(codec):
     """Format codec string."""
     if codec is None:
         return None
     return codec.upper()
 
+def _text_attr(plex_item, attr):
+    """Return a stripped string attribute, or None if missing/empty."""
+    value = getattr(plex_item, attr, None)
+    return value.strip() if isinstance(value, str) and value else None
+
+def _tag_csv(plex_item, attr):
+    """Return the tags of a tag-list attribute (genres, directors, ...) as CSV."""
+    tags = getattr(plex_item, attr, None)
+    if not tags:
+        return None
+    return ", ".join([tag.tag for tag in tags if tag.tag])
+
+def _float_attr(plex_item, attr):
+    """Return a numeric attribute as float, or None if missing/invalid."""
+    value = getattr(plex_item, attr, None)
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return None
+
 def extract_genres(plex_item):
     """Extract genres as CSV string."""
-    if not hasattr(plex_item, 'genres') or not plex_item.genres:
-        return None
-    return ", ".join([genre.tag for genre in plex_item.genres if genre.tag])
+    return _tag_csv(plex_item, 'genres')
 
 def extract_actors(plex_item):
     """Extract actors as CSV string formatted as 'Name as Role'."""
-    if not hasattr(plex_item, 'roles') or not plex_item.roles:
+    roles = getattr(plex_item, 'roles', None)
+    if not roles:
         return None
     actors = []
-    for role in plex_item.roles:
-        if hasattr(role, 'tag') and role.tag:
-            role_name = role.role if hasattr(role, 'role') and role.role else None
-            if role_name:
-                actors.append(f"{role.tag} as {role_name}")
-            else:
-                actors.append(role.tag)
+    for role in roles:
+        name = getattr(role, 'tag', None)
+        if name:
+            role_name = getattr(role, 'role', None)
+            actors.append(f"{name} as {role_name}" if role_name else name)
     return ", ".join(actors) if actors else None
 
 def extract_directors(plex_item):
     """Extract directors as CSV string."""
-    if not hasattr(plex_item, 'directors') or not plex_item.directors:
-        return None
-    return ", ".join([director.tag for director in plex_item.directors if director.tag])
+    return _tag_csv(plex_item, 'directors')
 
 def extract_writers(plex_item):
     """Extract writers as CSV string."""
-    if not hasattr(plex_item, 'writers') or not plex_item.writers:
-        return None
-    return ", ".join([writer.tag for writer in plex_item.writers if writer.tag])
+    return _tag_csv(plex_item, 'writers')
 
 def extract_producers(plex_item):
     """Extract producers as CSV string."""
-    if not hasattr(plex_item, 'producers') or not plex_item.producers:
-        return None
-    return ", ".join([producer.tag for producer in plex_item.producers if producer.tag])
+    return _tag_csv(plex_item, 'producers')
 
 def extract_studio(plex_item):
     """Extract studio name."""
-    if not hasattr(plex_item, 'studio') or not plex_item.studio:
-        return None
-    return plex_item.studio
+    return getattr(plex_item, 'studio', None) or None
 
 def extract_summary(plex_item):
     """Extract summary/description."""
-    if not hasattr(plex_item, 'summary') or not plex_item.summary:
-        return None
-    return plex_item.summary.strip() if plex_item.summary else None
+    return _text_attr(plex_item, 'summary')
 
 def extract_tagline(plex_item):
     """Extract tagline."""
-    if not hasattr(plex_item, 'tagline') or not plex_item.tagline:
-        return None
-    return plex_item.tagline.strip() if plex_item.tagline else None
+    return _text_attr(plex_item, 'tagline')
 
 def extract_originally_available(plex_item):
     """Extract originallyAvailableAt date as ISO string."""
-    if not hasattr(plex_item, 'originallyAvailableAt') or not plex_item.originallyAvailableAt:
+    value = getattr(plex_item, 'originallyAvailableAt', None)
+    if not value:
         return None
     # Convert to ISO format string if it's a date object
-    if hasattr(plex_item.originallyAvailableAt, 'isoformat'):
-        return plex_item.originallyAvailableAt.isoformat()
-    return str(plex_item.originallyAvailableAt)
+    isoformat = getattr(value, 'isoformat', None)
+    return isoformat() if isoformat else str(value)
 
 def extract_rating(plex_item):
     """Extract rating (0-10 scale)."""
-    if not hasattr(plex_item, 'rating') or plex_item.rating is None:
-        return None
-    try:
-        return float(plex_item.rating)
-    except (ValueError, TypeError):
-        return None
+    return _float_attr(plex_item, 'rating')
 
 def extract_audience_rating(plex_item):
     """Extract audience rating (0-10 scale)."""
-    if not hasattr(plex_item, 'audienceRating') or plex_item.audienceRating is None:
-        return None
-    try:
-        return float(plex_item.audienceRating)
-    except (ValueError, TypeError):
-        return None
+    return _float_attr(plex_item, 'audienceRating')
 
 def format_year_range(years):
     """Format year range, handling single year case."""
@@ -264,6 +324,23 @@ def format_year_range(years):
         return str(valid_years[0])
     return f"{min(valid_years)}-{max(valid_years)}"
 
+def create_http_session(pool_size=32, max_retries=3, backoff_factor=2):
+    """Create a pooled HTTP session that retries transient failures with backoff."""
+    session = requests.Session()
+    retry = Retry(
+        total=max_retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=("GET",)
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+# Shared across download threads so connections to Plex are kept alive and reused
+_SESSION = create_http_session()
+
 def fetch_with_retry(fetch_func, item_name, max_retries=3, base_wait=2):
     """Generic retry wrapper for Plex API calls."""
     for attempt in range(max_retries):
@@ -279,53 +356,141 @@ def fetch_with_retry(fetch_func, item_name, max_retries=3, base_wait=2):
                 return []
     return []
 
-def download_and_convert_image(plex_item, output_path, plex_server, max_retries=3):
-    """Download thumbnail from Plex and convert to WebP with retry logic."""
-    logger = logging.getLogger(__name__)
-    for attempt in range(max_retries):
-        try:
-            # Ensure output directory exists
-            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+# Per-server (prefix, token suffix) for thumbnail URLs, keyed by id(plex_server)
+_THUMB_URL_PARTS = {}
+
+def build_thumb_url(plex_server, thumb):
+    """Return the tokenized URL for a thumb key, building the server part only once."""
+    parts = _THUMB_URL_PARTS.get(id(plex_server))
+    if parts is None:
+        prefix, _, token = plex_server.url("", includeToken=True).partition("?")
+        parts = _THUMB_URL_PARTS[id(plex_server)] = (prefix, token)
+    prefix, token = parts
+    if not token:
+        return prefix + thumb
+    return f"{prefix}{thumb}{'&' if '?' in thumb else '?'}{token}"
+
+def image_up_to_date(plex_item, output_path):
+    """Return True if our copy is newer than Plex's last update of the item."""
+    updated_at = getattr(plex_item, 'updatedAt', None)
+    if updated_at is None:
+        return False
+    try:
+        return updated_at.timestamp() <= os.path.getmtime(output_path)
+    except (OSError, ValueError, OverflowError):
+        return False  # No local copy yet (or unusable timestamp)
+
+def encode_webp(source, output_path):
+    """Decode an image from a file-like object and save it as WebP."""
+    img = Image.open(source)
+    # Save as WebP (output_path should already be .webp); WebP keeps alpha natively
+    # method=0 is the fastest encoder setting, plenty for thumbnails
+    img.save(output_path, 'WEBP', quality=80, method=0)
+
+def download_and_convert_image(plex_item, output_path, plex_server):
+    """Download thumbnail from Plex and convert to WebP (retries are handled by _SESSION)."""
+    
+    # Skip the download if the thumbnail hasn't changed since we saved it
+    if image_up_to_date(plex_item, output_path):
+        return True
+    
+    try:
+        # Get thumbnail URL
+        if not plex_item.thumb:
+            return False
             
-            # Get thumbnail URL
-            if not plex_item.thumb:
+        thumb_url = build_thumb_url(plex_server, plex_item.thumb)
+        
+        # Stream the body straight into Pillow instead of buffering it first
+        with _SESSION.get(thumb_url, timeout=30, stream=True) as response:
+            if response.status_code != 200:
                 return False
-                
-            thumb_url = plex_server.url(plex_item.thumb, includeToken=True)
-            
-            # Download image with longer timeout
-            response = requests.get(thumb_url, timeout=30)
-            if response.status_code == 200:
-                # Convert to WebP
-                img = Image.open(io.BytesIO(response.content))
-                # Convert RGBA to RGB if needed
-                if img.mode == 'RGBA':
-                    rgb_img = Image.new('RGB', img.size, (0, 0, 0))
-                    rgb_img.paste(img, mask=img.split()[3])
-                    img = rgb_img
-                
-                # Save as WebP (output_path should already be .webp)
-                img.save(output_path, 'WEBP', quality=80)
-                return True
-        except requests.exceptions.Timeout:
-            if attempt < max_retries - 1:
-                wait_time = (attempt + 1) * 2
-                logger.debug(f"Timeout downloading image, retrying in {wait_time}s... (attempt {attempt + 1}/{max_retries})")
-                time.sleep(wait_time)
-                continue
-            else:
-                logger.warning(f"Failed to download image after {max_retries} attempts")
-        except Exception as e:
-            if attempt < max_retries - 1:
-                wait_time = (attempt + 1) * 2
-                logger.debug(f"Error downloading image, retrying in {wait_time}s... (attempt {attempt + 1}/{max_retries})")
-                time.sleep(wait_time)
-                continue
-            else:
-                item_name = plex_item.title if hasattr(plex_item, 'title') else 'unknown'
-                logger.warning(f"Error downloading image for {item_name}: {e}")
+            response.raw.decode_content = True
+            encode_webp(response.raw, output_path)
+        return True
+    except Exception as e:
+        item_name = plex_item.title if hasattr(plex_item, 'title') else 'unknown'
+        logger.warning(f"Error downloading image for {item_name}: {e}")
     return False
 
+# WebP encoder processes, started on first use and shared by every download
+# batch of the run (main() shuts them down once all libraries are done)
+_ENCODER_POOL = None
+_ENCODER_POOL_LOCK = threading.Lock()
+
+def get_encoder_pool():
+    """Return the shared WebP encoder process pool, starting it if needed."""
+    global _ENCODER_POOL
+    with _ENCODER_POOL_LOCK:
+        if _ENCODER_POOL is None:
+            # Libraries sync on concurrent threads; spawn keeps workers from forking a
+            # process whose other threads may be holding locks
+            _ENCODER_POOL = ProcessPoolExecutor(mp_context=multiprocessing.get_context("spawn"))
+        return _ENCODER_POOL
+
+def shutdown_encoder_pool():
+    """Stop the shared encoder pool, if one was started."""
+    global _ENCODER_POOL
+    with _ENCODER_POOL_LOCK:
+        if _ENCODER_POOL is not None:
+            _ENCODER_POOL.shutdown()
+            _ENCODER_POOL = None
+
+async def download_images_async(image_tasks, max_concurrency=64, max_retries=3, base_wait=2):
+    """Download images concurrently on one event loop, encoding WebP in worker processes.
+    
+    Fetching is network bound and stays on the event loop; decoding and
+    encoding are CPU bound, so they run in a process pool across all cores.
+    """
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(max_concurrency)
+    
+    async def download(session, encoder, plex_item, output_path, plex_server):
+        if image_up_to_date(plex_item, output_path):
+            return True
+        if not plex_item.thumb:
+            return False
+        thumb_url = build_thumb_url(plex_server, plex_item.thumb)
+        
+        async with semaphore:
+            for attempt in range(max_retries):
+                try:
+                    async with session.get(thumb_url) as response:
+                        if response.status != 200:
+                            return False
+                        data = await response.read()
+                    break
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    if attempt < max_retries - 1:
+                        await asyncio.sleep((attempt + 1) * base_wait)
+                        continue
+                    item_name = plex_item.title if hasattr(plex_item, 'title') else 'unknown'
+                    logger.warning(f"Error downloading image for {item_name}: {e}")
+                    return False
+        
+        await loop.run_in_executor(encoder, encode_webp, io.BytesIO(data), output_path)
+        return True
+    
+    connector = aiohttp.TCPConnector(limit=max_concurrency)
+    timeout = aiohttp.ClientTimeout(total=30)
+    encoder = get_encoder_pool()
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        results = await asyncio.gather(
+            *(download(session, encoder, *task) for task in image_tasks),
+            return_exceptions=True
+        )
+    
+    downloaded = 0
+    failed = 0
+    for result in results:
+        if result is True:
+            downloaded += 1
+        else:
+            failed += 1
+            if isinstance(result, Exception):
+                logger.error(f"Exception in image download worker: {result}")
+    return {'downloaded': downloaded, 'failed': failed}
+
 def download_image_worker(args):
     """Worker function for parallel image downloads."""
     plex_item, output_path, plex_server = args
@@ -334,11 +499,13 @@ def download_image_worker(args):
     return (success, item_name, output_path)
 
 def download_images_parallel(image_tasks, max_workers=10):
-    """Download images in parallel using ThreadPoolExecutor."""
-    logger = logging.getLogger(__name__)
+    """Download images in parallel (asyncio when aiohttp is installed, else a thread pool)."""
     if not image_tasks:
         return {'downloaded': 0, 'failed': 0}
     
+    if aiohttp is not None:
+        return asyncio.run(download_images_async(image_tasks))
+    
     downloaded = 0
     failed = 0
     
@@ -360,19 +527,22 @@ def download_images_parallel(image_tasks, max_workers=10):
 
 def process_episode(episode: Episode, season_rating_key: int, show_rating_key: int,
                    image_folder: str, plex_server: PlexServer, current_time: str,
-                   image_stats: dict, download_image=True):
-    """Process a single episode and return data for batch insert."""
-    logger = logging.getLogger(__name__)
+                   image_stats: dict, download_image=True, existing_hashes=None):
+    """Process a single episode and return data for batch insert.
+    
+    If the episode's mediaHash matches existing_hashes, 'data' is None and the
+    stored row is left as is.
+    """
     episode_rating_key = validate_rating_key(episode.ratingKey)
     episode_duration = episode.duration or 0
     
     if not episode.media:
-        logger.debug(f"    Skipping episode '{episode.title}': no media found")
+        logger.debug("    Skipping episode '%s': no media found", episode.title)
         return None
     
     episode_media = episode.media[0]
     if not episode_media.parts:
-        logger.debug(f"    Skipping episode '{episode.title}': no media parts found")
+        logger.debug("    Skipping episode '%s': no media parts found", episode.title)
         return None
     
     episode_part = episode_media.parts[0]
@@ -386,15 +556,29 @@ def process_episode(episode: Episode, season_rating_key: int, show_rating_key: i
         size_bytes, episode_duration, video_codec, video_resolution,
         episode_part.container, episode.title, episode.year
     )
+    episode_image_path = f"{image_folder}/{episode_rating_key}.thumb.webp"
+    
+    # Unchanged episodes skip metadata extraction and the image (unless it's missing)
+    if existing_hashes and existing_hashes.get(episode_rating_key) == media_hash:
+        logger.debug("    Skipping unchanged episode (ratingKey: %s)", episode_rating_key)
+        if download_image and DOWNLOAD_IMAGES and not os.path.exists(episode_image_path):
+            if download_and_convert_image(episode, episode_image_path, plex_server):
+                image_stats['downloaded'] += 1
+            else:
+                image_stats['failed'] += 1
+        return {
+            'data': None,
+            'rating_key': episode_rating_key,
+            'media_hash': media_hash
+        }
     
     # Download and convert episode thumbnail (if requested)
     if download_image and DOWNLOAD_IMAGES:
-        episode_image_path = os.path.join(image_folder, f"{episode_rating_key}.thumb.webp")
         if download_and_convert_image(episode, episode_image_path, plex_server):
             image_stats['downloaded'] += 1
         else:
             image_stats['failed'] += 1
-            logger.debug(f"    Image download failed for episode '{episode.title}'")
+            logger.debug("    Image download failed for episode '%s'", episode.title)
     
     # Extract metadata
     summary = extract_summary(episode)
@@ -406,7 +590,7 @@ def process_episode(episode: Episode, season_rating_key: int, show_rating_key: i
     audience_rating = extract_audience_rating(episode)
     
     # Return episode data and metadata
-    # Note: duration/sizeBytes are raw values, durationHuman/sizeHuman are display-friendly
+    # Note: durationHuman/sizeHuman are generated by SQLite from duration/sizeBytes
     episode_data = (
         episode_rating_key,
         season_rating_key,
@@ -415,13 +599,11 @@ def process_episode(episode: Episode, season_rating_key: int, show_rating_key: i
         episode.title,
         episode.year,
         episode_duration,  # Raw duration in milliseconds
-        human_readable_duration(episode_duration) if episode_duration else None,  # Display-friendly
         audio_codec,
         episode_part.container,
         video_codec,
         video_resolution,
         size_bytes,  # Raw size in bytes
-        human_readable_size(size_bytes),  # Display-friendly
         media_hash,  # Hash fingerprint
         summary,
         originally_available,
@@ -436,35 +618,26 @@ def process_episode(episode: Episode, season_rating_key: int, show_rating_key: i
     
     return {
         'data': episode_data,
-        'duration': episode_duration,
-        'size_bytes': size_bytes,
-        'year': episode.year,
-        'video_resolution': video_resolution,
-        'audio_codec': audio_codec,
-        'video_codec': video_codec,
-        'container': episode_part.container,
+        'rating_key': episode_rating_key,
         'media_hash': media_hash
     }
 
 def process_season(season: Season, show_rating_key: int, image_folder: str,
-                  plex_server: PlexServer, current_time: str, image_stats: dict):
-    """Process a single season and return data for batch insert."""
-    logger = logging.getLogger(__name__)
+                  plex_server: PlexServer, current_time: str, image_stats: dict,
+                  existing_hashes=None, episodes=None):
+    """Process a single season and return data for batch insert.
+    
+    episodes can be passed in when the show's episodes were already fetched;
+    otherwise they are requested from Plex for this season.
+    """
     season_rating_key = validate_rating_key(season.ratingKey)
     
-    season_size_bytes = 0
-    season_total_episodes = 0
-    season_total_duration = 0
-    season_years = []
-    season_video_resolutions = []
-    season_audio_codecs = []
-    season_video_codecs = []
-    season_containers = []
+    episode_keys = []
     episodes_data = []
     episode_image_tasks = []
     
-    # Fetch episodes with retry
-    episodes_list = fetch_with_retry(
+    # Fetch episodes with retry (unless the caller already has them)
+    episodes_list = episodes if episodes is not None else fetch_with_retry(
         lambda: season.episodes(),
         f"episodes for season {season.seasonNumber}",
         max_retries=3
@@ -476,39 +649,23 @@ def process_season(season: Season, show_rating_key: int, image_folder: str,
         episode_result = process_episode(
             episode, season_rating_key, show_rating_key,
             image_folder, plex_server, current_time, image_stats,
-            download_image=download_now
+            download_image=download_now, existing_hashes=existing_hashes
         )
         
         if episode_result:
-            episodes_data.append(episode_result['data'])
-            season_total_episodes += 1
-            season_total_duration += episode_result['duration']
-            season_size_bytes += episode_result['size_bytes']
-            season_years.append(episode_result['year'])
-            season_video_resolutions.append(episode_result['video_resolution'])
-            season_audio_codecs.append(episode_result['audio_codec'])
-            season_video_codecs.append(episode_result['video_codec'])
-            season_containers.append(episode_result['container'])
+            episode_rating_key = episode_result['rating_key']
+            episode_keys.append(episode_rating_key)
+            unchanged = episode_result['data'] is None
+            if not unchanged:
+                episodes_data.append(episode_result['data'])
             
-            # Collect image task for parallel download
+            # Collect image task for parallel download (unchanged episodes only if missing)
             if USE_PARALLEL and DOWNLOAD_IMAGES:
-                episode_rating_key = episode_result['data'][0]  # ratingKey is first element
-                episode_image_path = os.path.join(image_folder, f"{episode_rating_key}.thumb.webp")
-                episode_image_tasks.append((episode, episode_image_path, plex_server))
+                episode_image_path = f"{image_folder}/{episode_rating_key}.thumb.webp"
+                if not unchanged or not os.path.exists(episode_image_path):
+                    episode_image_tasks.append((episode, episode_image_path, plex_server))
     
-    # Calculate average episode duration for the season
-    avg_season_duration = season_total_duration // season_total_episodes if season_total_episodes > 0 else 0
-    
-    # Download and convert season thumbnail
-    season_image_path = os.path.join(image_folder, f"{season_rating_key}.thumb.webp")
-    if DOWNLOAD_IMAGES:
-        if download_and_convert_image(season, season_image_path, plex_server):
-            image_stats['downloaded'] += 1
-        else:
-            image_stats['failed'] += 1
-    
-    # Format year range (handles single year case)
-    year_range = format_year_range(season_years)
+    # The season thumbnail is queued by process_tvshows with the show images
     
     # Extract metadata
     summary = extract_summary(season)
@@ -516,20 +673,19 @@ def process_season(season: Season, show_rating_key: int, image_folder: str,
     originally_available = extract_originally_available(season)
     
     # Collect season data for batch insert
+    # Episode totals, averages and CSVs are filled in by rollup_tv_stats() after insert
     season_data = (
         season_rating_key,
         show_rating_key,
         season.seasonNumber,
-        season_total_episodes,
-        avg_season_duration,  # Raw average duration in milliseconds
-        human_readable_duration(avg_season_duration) if avg_season_duration > 0 else None,  # Display-friendly
-        season_size_bytes,  # Raw size in bytes
-        human_readable_size(season_size_bytes),  # Display-friendly
-        ", ".join(sorted(set([r for r in season_video_resolutions if r]))),
-        ", ".join(sorted(set([c for c in season_audio_codecs if c]))),
-        ", ".join(sorted(set([c for c in season_video_codecs if c]))),
-        ", ".join(sorted(set([c for c in season_containers if c]))),
-        year_range,
+        0,  # seasonTotalEpisode
+        0,  # avgSeasonEpisodeDuration
+        0,  # seasonSizeBytes
+        "",  # avgSeasonVideoResolution
+        "",  # avgSeasonAudioCodec
+        "",  # avgSeasonVideoCodec
+        "",  # avgSeasonContainer
+        None,  # yearRange
         summary,
         season_title,
         originally_available,
@@ -539,18 +695,460 @@ def process_season(season: Season, show_rating_key: int, image_folder: str,
     
     return {
         'season_data': season_data,
+        'episode_keys': episode_keys,
         'episodes_data': episodes_data,
         'episode_image_tasks': episode_image_tasks,
-        'total_episodes': season_total_episodes,
-        'total_duration': season_total_duration,
-        'size_bytes': season_size_bytes,
-        'years': season_years,
-        'video_resolutions': season_video_resolutions,
-        'audio_codecs': season_audio_codecs,
-        'video_codecs': season_video_codecs,
-        'containers': season_containers
+        'image_stats': image_stats
     }
 
+# Display columns SQLite derives from the raw values on read (VIRTUAL, nothing stored)
+GENERATED_HUMAN_COLUMNS = {
+    "movies": (
+        ("durationHuman", f"CASE WHEN duration THEN {sql_human_duration('duration')} END"),
+        ("sizeHuman", sql_human_size("sizeBytes")),
+    ),
+    "tv_shows": (
+        ("avgEpisodeDurationHuman",
+         f"CASE WHEN avgEpisodeDuration > 0 THEN {sql_human_duration('avgEpisodeDuration')} END"),
+        ("showSizeHuman", sql_human_size("showSizeBytes")),
+    ),
+    "seasons": (
+        ("avgSeasonEpisodeDurationHuman",
+         f"CASE WHEN avgSeasonEpisodeDuration > 0 THEN {sql_human_duration('avgSeasonEpisodeDuration')} END"),
+        ("seasonSizeHuman", sql_human_size("seasonSizeBytes")),
+    ),
+    "episodes": (
+        ("durationHuman", f"CASE WHEN duration THEN {sql_human_duration('duration')} END"),
+        ("sizeHuman", sql_human_size("sizeBytes")),
+    ),
+    "artists": (
+        ("totalSizeHuman", sql_human_size("totalSizeBytes")),
+    ),
+    "albums": (
+        ("albumSizeHuman", sql_human_size("albumSizeBytes")),
+        ("albumDurationHuman", f"CASE WHEN albumDuration THEN {sql_human_duration('albumDuration')} END"),
+    ),
+    "tracks": (
+        ("durationHuman", f"CASE WHEN duration THEN {sql_human_duration('duration')} END"),
+        ("sizeHuman", sql_human_size("sizeBytes")),
+    ),
+}
+
+def generated_column_sql(table_name, column_name):
+    """Column definition for one of GENERATED_HUMAN_COLUMNS."""
+    expression = dict(GENERATED_HUMAN_COLUMNS[table_name])[column_name]
+    return f"{column_name} TEXT GENERATED ALWAYS AS ({expression}) VIRTUAL"
+
+# Tables and parent-key indexes, run with a single executescript() by init_database().
+# The remaining indexes and the search index are created by create_indexes()
+SCHEMA_DDL = f"""
+    -- Movies table
+    -- Note: duration/sizeBytes are raw values (milliseconds/bytes), durationHuman/sizeHuman are display-friendly
+    -- *Human columns are generated from the raw values (see GENERATED_HUMAN_COLUMNS)
+    -- mediaHash is a fingerprint to detect changes and skip unnecessary updates
+    CREATE TABLE IF NOT EXISTS movies (
+        ratingKey INTEGER PRIMARY KEY,
+        title TEXT NOT NULL,
+        year INTEGER,
+        contentRating TEXT,
+        duration INTEGER,  -- Raw duration in milliseconds
+        {generated_column_sql("movies", "durationHuman")},
+        audioCodec TEXT,
+        container TEXT,
+        videoCodec TEXT,
+        videoResolution TEXT,
+        sizeBytes INTEGER,  -- Raw size in bytes
+        {generated_column_sql("movies", "sizeHuman")},
+        mediaHash TEXT,  -- Hash fingerprint to detect changes
+        summary TEXT,  -- Movie description/summary
+        tagline TEXT,  -- Movie tagline
+        genres TEXT,  -- CSV of genre names
+        studio TEXT,  -- Production studio
+        directors TEXT,  -- CSV of director names
+        writers TEXT,  -- CSV of writer names
+        producers TEXT,  -- CSV of producer names
+        actors TEXT,  -- CSV of actors formatted as "Name as Role"
+        originallyAvailableAt TEXT,  -- Original release date (ISO format)
+        rating REAL,  -- Rating (0-10 scale)
+        audienceRating REAL,  -- Audience rating (0-10 scale)
+        available INTEGER DEFAULT 1,
+        lastSeen TEXT DEFAULT CURRENT_TIMESTAMP
+    );
+
+    -- TV Shows table
+    -- Note: avgEpisodeDuration/showSizeBytes are raw values, avgEpisodeDurationHuman/showSizeHuman are display-friendly
+    -- *Human columns are generated from the raw values (see GENERATED_HUMAN_COLUMNS)
+    -- CSV fields (avgVideoResolutions, etc.) aggregate values across all episodes for display
+    CREATE TABLE IF NOT EXISTS tv_shows (
+        ratingKey INTEGER PRIMARY KEY,
+        title TEXT NOT NULL,
+        contentRating TEXT,
+        avgEpisodeDuration INTEGER,  -- Raw average duration in milliseconds
+        {generated_column_sql("tv_shows", "avgEpisodeDurationHuman")},
+        seasonCount INTEGER,
+        showTotalEpisode INTEGER,
+        showSizeBytes INTEGER,  -- Raw total size in bytes
+        {generated_column_sql("tv_shows", "showSizeHuman")},
+        avgVideoResolutions TEXT,  -- CSV of unique resolutions across episodes
+        avgAudioCodecs TEXT,  -- CSV of unique audio codecs
+        avgVideoCodecs TEXT,  -- CSV of unique video codecs
+        avgContainers TEXT,  -- CSV of unique containers
+        showYearRange TEXT,  -- Year range (e.g., "2020-2023" or "2023" for single year)
+        summary TEXT,  -- Show description/summary
+        genres TEXT,  -- CSV of genre names
+        studio TEXT,  -- Production studio
+        actors TEXT,  -- CSV of actors formatted as "Name as Role"
+        originallyAvailableAt TEXT,  -- Original release date (ISO format)
+        rating REAL,  -- Rating (0-10 scale)
+        audienceRating REAL,  -- Audience rating (0-10 scale)
+        available INTEGER DEFAULT 1,
+        lastSeen TEXT DEFAULT CURRENT_TIMESTAMP
+    );
+
+    -- Seasons table
+    -- *Human columns are generated from the raw values (see GENERATED_HUMAN_COLUMNS)
+    CREATE TABLE IF NOT EXISTS seasons (
+        seasonRatingKey INTEGER PRIMARY KEY,
+        showRatingKey INTEGER NOT NULL,
+        seasonNumber INTEGER,
+        seasonTotalEpisode INTEGER,
+        avgSeasonEpisodeDuration INTEGER,
+        {generated_column_sql("seasons", "avgSeasonEpisodeDurationHuman")},
+        seasonSizeBytes INTEGER,
+        {generated_column_sql("seasons", "seasonSizeHuman")},
+        avgSeasonVideoResolution TEXT,
+        avgSeasonAudioCodec TEXT,
+        avgSeasonVideoCodec TEXT,
+        avgSeasonContainer TEXT,
+        yearRange TEXT,
+        summary TEXT,  -- Season description/summary
+        title TEXT,  -- Season title
+        originallyAvailableAt TEXT,  -- Original release date (ISO format)
+        available INTEGER DEFAULT 1,
+        lastSeen TEXT DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (showRatingKey) REFERENCES tv_shows(ratingKey) ON DELETE CASCADE
+    );
+
+    -- Episodes table
+    -- Note: mediaHash is a fingerprint to detect changes and skip unnecessary updates
+    -- *Human columns are generated from the raw values (see GENERATED_HUMAN_COLUMNS)
+    CREATE TABLE IF NOT EXISTS episodes (
+        ratingKey INTEGER PRIMARY KEY,
+        seasonRatingKey INTEGER NOT NULL,
+        showRatingKey INTEGER NOT NULL,
+        episodeNumber INTEGER,
+        title TEXT,
+        year INTEGER,
+        duration INTEGER,
+        {generated_column_sql("episodes", "durationHuman")},
+        audioCodec TEXT,
+        container TEXT,
+        videoCodec TEXT,
+        videoResolution TEXT,
+        sizeBytes INTEGER,
+        {generated_column_sql("episodes", "sizeHuman")},
+        mediaHash TEXT,  -- Hash fingerprint to detect changes
+        summary TEXT,  -- Episode description/summary
+        originallyAvailableAt TEXT,  -- Original air date (ISO format)
+        directors TEXT,  -- CSV of director names
+        writers TEXT,  -- CSV of writer names
+        actors TEXT,  -- CSV of actors formatted as "Name as Role"
+        rating REAL,  -- Rating (0-10 scale)
+        audienceRating REAL,  -- Audience rating (0-10 scale)
+        available INTEGER DEFAULT 1,
+        lastSeen TEXT DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (seasonRatingKey) REFERENCES seasons(seasonRatingKey) ON DELETE CASCADE,
+        FOREIGN KEY (showRatingKey) REFERENCES tv_shows(ratingKey) ON DELETE CASCADE
+    );
+
+    -- Artists table
+    -- Note: totalSizeBytes is raw value, totalSizeHuman is display-friendly
+    -- *Human columns are generated from the raw values (see GENERATED_HUMAN_COLUMNS)
+    CREATE TABLE IF NOT EXISTS artists (
+        ratingKey INTEGER PRIMARY KEY,
+        artistName TEXT NOT NULL,
+        totalAlbums INTEGER,
+        totalTracks INTEGER,
+        totalSizeBytes INTEGER,  -- Raw total size in bytes
+        {generated_column_sql("artists", "totalSizeHuman")},
+        yearRange TEXT,  -- Year range (e.g., "2020-2023" or "2023" for single year)
+        summary TEXT,  -- Artist biography/description
+        genres TEXT,  -- CSV of genre names
+        available INTEGER DEFAULT 1,
+        lastSeen TEXT DEFAULT CURRENT_TIMESTAMP
+    );
+
+    -- Albums table
+    -- Note: albumSizeBytes/albumDuration are raw values, albumSizeHuman/albumDurationHuman are display-friendly
+    -- *Human columns are generated from the raw values (see GENERATED_HUMAN_COLUMNS)
+    -- albumContainers is CSV of container types (may vary across tracks, usually not critical for UI)
+    CREATE TABLE IF NOT EXISTS albums (
+        ratingKey INTEGER PRIMARY KEY,
+        artistRatingKey INTEGER NOT NULL,
+        title TEXT NOT NULL,
+        year INTEGER,
+        tracks INTEGER,
+        albumSizeBytes INTEGER,  -- Raw total size in bytes
+        {generated_column_sql("albums", "albumSizeHuman")},
+        albumDuration INTEGER,  -- Raw total duration in milliseconds
+        {generated_column_sql("albums", "albumDurationHuman")},
+        albumContainers TEXT,  -- CSV of container types (may vary per track)
+        summary TEXT,  -- Album description/summary
+        genres TEXT,  -- CSV of genre names
+        originallyAvailableAt TEXT,  -- Original release date (ISO format)
+        studio TEXT,  -- Record label/studio
+        available INTEGER DEFAULT 1,
+        lastSeen TEXT DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (artistRatingKey) REFERENCES artists(ratingKey) ON DELETE CASCADE
+    );
+
+    -- Tracks table
+    -- Note: duration/sizeBytes are raw values, durationHuman/sizeHuman are display-friendly
+    -- *Human columns are generated from the raw values (see GENERATED_HUMAN_COLUMNS)
+    -- mediaHash is a fingerprint to detect changes and skip unnecessary updates
+    CREATE TABLE IF NOT EXISTS tracks (
+        ratingKey INTEGER PRIMARY KEY,
+        albumRatingKey INTEGER NOT NULL,
+        artistRatingKey INTEGER NOT NULL,
+        title TEXT NOT NULL,
+        trackNumber INTEGER,
+        duration INTEGER,  -- Raw duration in milliseconds
+        {generated_column_sql("tracks", "durationHuman")},
+        sizeBytes INTEGER,  -- Raw size in bytes
+        {generated_column_sql("tracks", "sizeHuman")},
+        container TEXT,
+        mediaHash TEXT,  -- Hash fingerprint to detect changes
+        summary TEXT,  -- Track description/summary (when available)
+        originallyAvailableAt TEXT,  -- Original release date (ISO format, when available)
+        genres TEXT,  -- CSV of genre names (when available)
+        available INTEGER DEFAULT 1,
+        lastSeen TEXT DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (albumRatingKey) REFERENCES albums(ratingKey) ON DELETE CASCADE,
+        FOREIGN KEY (artistRatingKey) REFERENCES artists(ratingKey) ON DELETE CASCADE
+    );
+
+    -- Parent-key indexes (needed while loading, so never deferred)
+    CREATE INDEX IF NOT EXISTS idx_seasons_show ON seasons(showRatingKey);
+    CREATE INDEX IF NOT EXISTS idx_episodes_season ON episodes(seasonRatingKey);
+    CREATE INDEX IF NOT EXISTS idx_episodes_show ON episodes(showRatingKey);
+    CREATE INDEX IF NOT EXISTS idx_albums_artist ON albums(artistRatingKey);
+    CREATE INDEX IF NOT EXISTS idx_tracks_album ON tracks(albumRatingKey);
+    CREATE INDEX IF NOT EXISTS idx_tracks_artist ON tracks(artistRatingKey);
+"""
+
+def build_insert_sql(table_name, columns):
+    """Build an upsert with one placeholder per column, keyed on the first column.
+    
+    An existing row is updated in place rather than replaced: REPLACE deletes
+    the old row first, and the ON DELETE CASCADE foreign keys would take its
+    children (which unchanged items don't re-insert) with it.
+    """
+    key_column = columns[0]
+    updates = ', '.join(f"{column} = excluded.{column}" for column in columns[1:])
+    return (
+        f"INSERT INTO {table_name} ({', '.join(columns)}) "
+        f"VALUES ({', '.join('?' * len(columns))}) "
+        f"ON CONFLICT({key_column}) DO UPDATE SET {updates}"
+    )
+
+# Column order of the row tuples built by the process_* functions.
+# The statements are built once at import so every batch reuses the same SQL
+# text (and sqlite3's cached prepared statement).
+MOVIE_COLUMNS = (
+    "ratingKey", "title", "year", "contentRating", "duration",
+    "audioCodec", "container", "videoCodec", "videoResolution", "sizeBytes",
+    "mediaHash", "summary", "tagline", "genres", "studio", "directors",
+    "writers", "producers", "actors", "originallyAvailableAt", "rating",
+    "audienceRating", "available", "lastSeen",
+)
+MOVIE_INSERT_SQL = build_insert_sql("movies", MOVIE_COLUMNS)
+
+SHOW_COLUMNS = (
+    "ratingKey", "title", "contentRating", "avgEpisodeDuration",
+    "seasonCount", "showTotalEpisode", "showSizeBytes", "avgVideoResolutions", "avgAudioCodecs", "avgVideoCodecs",
+    "avgContainers", "showYearRange", "summary", "genres", "studio", "actors",
+    "originallyAvailableAt", "rating", "audienceRating", "available", "lastSeen",
+)
+SHOW_INSERT_SQL = build_insert_sql("tv_shows", SHOW_COLUMNS)
+
+SEASON_COLUMNS = (
+    "seasonRatingKey", "showRatingKey", "seasonNumber", "seasonTotalEpisode",
+    "avgSeasonEpisodeDuration", "seasonSizeBytes", "avgSeasonVideoResolution", "avgSeasonAudioCodec",
+    "avgSeasonVideoCodec", "avgSeasonContainer", "yearRange", "summary", "title",
+    "originallyAvailableAt", "available", "lastSeen",
+)
+SEASON_INSERT_SQL = build_insert_sql("seasons", SEASON_COLUMNS)
+
+EPISODE_COLUMNS = (
+    "ratingKey", "seasonRatingKey", "showRatingKey", "episodeNumber", "title", "year",
+    "duration", "audioCodec", "container", "videoCodec",
+    "videoResolution", "sizeBytes", "mediaHash", "summary",
+    "originallyAvailableAt", "directors", "writers", "actors", "rating",
+    "audienceRating", "available", "lastSeen",
+)
+EPISODE_INSERT_SQL = build_insert_sql("episodes", EPISODE_COLUMNS)
+
+ARTIST_COLUMNS = (
+    "ratingKey", "artistName", "totalAlbums", "totalTracks", "totalSizeBytes",
+    "yearRange", "summary", "genres", "available", "lastSeen",
+)
+ARTIST_INSERT_SQL = build_insert_sql("artists", ARTIST_COLUMNS)
+
+ALBUM_COLUMNS = (
+    "ratingKey", "artistRatingKey", "title", "year", "tracks", "albumSizeBytes",
+    "albumDuration", "albumContainers",
+    "summary", "genres", "originallyAvailableAt", "studio", "available", "lastSeen",
+)
+ALBUM_INSERT_SQL = build_insert_sql("albums", ALBUM_COLUMNS)
+
+TRACK_COLUMNS = (
+    "ratingKey", "albumRatingKey", "artistRatingKey", "title", "trackNumber",
+    "duration", "sizeBytes", "container", "mediaHash",
+    "summary", "originallyAvailableAt", "genres", "available", "lastSeen",
+)
+TRACK_INSERT_SQL = build_insert_sql("tracks", TRACK_COLUMNS)
+
+def configure_connection(conn):
+    """Apply performance PRAGMAs to a freshly opened connection.
+    
+    journal_mode=WAL is persistent (stored in the database file), so the
+    backend's read-only connections pick it up too and can read while a
+    sync is writing. The rest are per-connection and must be set on every open.
+    """
+    conn.executescript("""
+        PRAGMA journal_mode = WAL;
+        PRAGMA synchronous = NORMAL;
+        PRAGMA temp_store = MEMORY;
+        PRAGMA mmap_size = 268435456;
+        PRAGMA cache_size = -128000;
+        PRAGMA wal_autocheckpoint = 1000;
+        PRAGMA busy_timeout = 30000;
+        PRAGMA foreign_keys = ON;
+    """)
+    return conn
+
+# Libraries sync on concurrent threads with their own connections; their write
+# transactions take turns on this lock instead of racing for SQLite's
+_WRITE_LOCK = threading.Lock()
+
+@contextmanager
+def transaction(conn):
+    """Run the block in one explicit write transaction.
+    
+    BEGIN IMMEDIATE takes the write lock up front, so a concurrent writer
+    fails fast at the start instead of midway through a batch. Also makes
+    DDL transactional, which Python's implicit BEGIN only does for DML.
+    Writers in this process are serialized by _WRITE_LOCK, so busy_timeout
+    only has to cover other processes.
+    """
+    with _WRITE_LOCK:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+
+def open_connection(db_path):
+    """Open and configure a connection to the collection database.
+    
+    The statement cache is raised from sqlite3's default of 128 so every
+    upsert, rollup and migration statement stays compiled for the whole run.
+    """
+    return configure_connection(sqlite3.connect(db_path, cached_statements=256))
+
+def close_connection(conn):
+    """Let SQLite refresh planner statistics it needs, then close."""
+    try:
+        # optimize may run ANALYZE, which writes
+        with _WRITE_LOCK:
+            conn.execute("PRAGMA optimize")
+    finally:
+        conn.close()
+
+# Tables mirrored into search_fts: table -> (type, title column, year column)
+# The trigram tokenizer (SQLite 3.34+) matches any 3+ character substring,
+# so partial words find results without falling back to LIKE scans
+SEARCH_TOKENIZER = "trigram" if sqlite3.sqlite_version_info >= (3, 34, 0) else "unicode61"
+
+SEARCH_SOURCES = {
+    "movies": ("movie", "title", "year"),
+    "tv_shows": ("show", "title", "NULL"),
+    "artists": ("artist", "artistName", "NULL"),
+}
+
+def create_search_index(conn):
+    """Create the search_fts table and the triggers that keep it in sync.
+    
+    search_fts is an external-content FTS5 table: it only stores the index,
+    and reads column values back from the search_source view over the
+    source tables (rowid = ratingKey). Triggers on the source tables update
+    the index inside the same transaction as the sync writes. A newly
+    created index is filled with FTS5's 'rebuild' command.
+    Raises sqlite3.OperationalError if FTS5 is unavailable.
+    """
+    cursor = conn.cursor()
+    created = cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE name = 'search_fts'"
+    ).fetchone() is None
+    
+    sources = " UNION ALL ".join(
+        f"SELECT ratingKey, '{fts_type}' AS type, {title_column} AS title, "
+        f"COALESCE(summary, '') AS summary, {year_column} AS year, available FROM {table_name}"
+        for table_name, (fts_type, title_column, year_column) in SEARCH_SOURCES.items()
+    )
+    cursor.execute(f"CREATE VIEW IF NOT EXISTS search_source AS {sources}")
+    cursor.execute(f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS search_fts USING fts5(
+            type UNINDEXED,
+            ratingKey UNINDEXED,
+            title,
+            summary,
+            year UNINDEXED,
+            available UNINDEXED,
+            content = 'search_source',
+            content_rowid = 'ratingKey',
+            tokenize = '{SEARCH_TOKENIZER}'
+        )
+    """)
+    
+    for table_name, (fts_type, title_column, year_column) in SEARCH_SOURCES.items():
+        def index_values(row):
+            year_value = f"{row}.{year_column}" if year_column != "NULL" else "NULL"
+            return (f"{row}.ratingKey, '{fts_type}', {row}.ratingKey, {row}.{title_column}, "
+                    f"COALESCE({row}.summary, ''), {year_value}, {row}.available")
+        # External content: the old values must be removed from the index explicitly
+        delete = f"""
+            INSERT INTO search_fts(search_fts, rowid, type, ratingKey, title, summary, year, available)
+            VALUES ('delete', {index_values('old')});
+        """
+        insert = f"""
+            INSERT INTO search_fts(rowid, type, ratingKey, title, summary, year, available)
+            VALUES ({index_values('new')});
+        """
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {table_name}_fts_insert AFTER INSERT ON {table_name}
+            BEGIN {insert} END
+        """)
+        # Upserts rewrite every column, so only touch the index when an indexed value changed
+        indexed_columns = [title_column, "summary", "available"] + ([year_column] if year_column != "NULL" else [])
+        changed = " OR ".join(f"old.{column} IS NOT new.{column}" for column in indexed_columns)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {table_name}_fts_update AFTER UPDATE ON {table_name}
+            WHEN {changed}
+            BEGIN {delete} {insert} END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {table_name}_fts_delete AFTER DELETE ON {table_name}
+            BEGIN {delete} END
+        """)
+    
+    # Only index existing rows when the table is new; afterwards the triggers keep it current
+    if created:
+        cursor.execute("INSERT INTO search_fts(search_fts) VALUES ('rebuild')")
+        logger.info("FTS5 search index built")
+
 def get_schema_version(conn):
     """Get current schema version from database."""
     cursor = conn.cursor()
@@ -562,501 +1160,384 @@ def get_schema_version(conn):
         # Table doesn't exist yet
         return 0
 
-def set_schema_version(conn, version):
-    """Set schema version in database."""
-    cursor = conn.cursor()
-    cursor.execute("""
+def _ensure_schema_version_table(conn):
+    """Create the schema_version table if it doesn't exist yet."""
+    conn.execute("""
         CREATE TABLE IF NOT EXISTS schema_version (
             version INTEGER PRIMARY KEY,
             applied_at TEXT DEFAULT CURRENT_TIMESTAMP
         )
     """)
-    cursor.execute("INSERT OR REPLACE INTO schema_version (version) VALUES (?)", (version,))
-    conn.commit()
+
+def set_schema_version(conn, version):
+    """Set schema version in database (committed by the caller's transaction)."""
+    conn.execute("INSERT OR REPLACE INTO schema_version (version) VALUES (?)", (version,))
+
+def add_missing_columns(conn, table_name, columns):
+    """Add the (name, type) columns a table doesn't have yet.
+    
+    The existing columns are read once with PRAGMA table_info, so only the
+    ALTERs that are actually needed get issued.
+    """
+    cursor = conn.cursor()
+    existing = {row[1] for row in cursor.execute(f"PRAGMA table_info({table_name})")}
+    for col_name, col_type in columns:
+        if col_name in existing:
+            logger.debug("%s.%s already exists", table_name, col_name)
+            continue
+        cursor.execute(f"ALTER TABLE {table_name} ADD COLUMN {col_name} {col_type}")
+
+def convert_to_generated_columns(conn, table_name, redefine=False):
+    """Replace a table's stored *Human columns with their generated definitions.
+    
+    Columns that are already generated are left alone unless redefine is set,
+    which recreates them from the current GENERATED_HUMAN_COLUMNS. Needs
+    SQLite 3.35+ (ALTER TABLE DROP COLUMN); run inside the migration's transaction.
+    """
+    cursor = conn.cursor()
+    # table_xinfo's "hidden" is 2 for VIRTUAL generated columns
+    hidden = {row[1]: row[6] for row in cursor.execute(f"PRAGMA table_xinfo({table_name})")}
+    for column_name, _ in GENERATED_HUMAN_COLUMNS[table_name]:
+        if hidden.get(column_name) == 2 and not redefine:
+            continue
+        if column_name in hidden:
+            cursor.execute(f"ALTER TABLE {table_name} DROP COLUMN {column_name}")
+        cursor.execute(f"ALTER TABLE {table_name} ADD COLUMN {generated_column_sql(table_name, column_name)}")
+
+def rebuild_search_index(conn, version):
+    """Drop search_fts with its view and triggers, recreate it and record version."""
+    try:
+        with transaction(conn):
+            for table_name in SEARCH_SOURCES:
+                for event in ("insert", "update", "delete"):
+                    conn.execute(f"DROP TRIGGER IF EXISTS {table_name}_fts_{event}")
+            conn.execute("DROP TABLE IF EXISTS search_fts")
+            conn.execute("DROP VIEW IF EXISTS search_source")
+            create_search_index(conn)
+            set_schema_version(conn, version)
+        logger.info(f"Migration {version} completed: FTS5 search index rebuilt")
+    except sqlite3.OperationalError as e:
+        if "fts5" in str(e).lower() or "no such module" in str(e).lower():
+            logger.warning("FTS5 not available in this SQLite build, skipping search optimization")
+        else:
+            raise
+        with transaction(conn):
+            set_schema_version(conn, version)  # Mark as complete even if FTS5 unavailable
 
 def run_migrations(conn, current_version, target_version):
     """Run database migrations from current_version to target_version."""
-    logger = logging.getLogger(__name__)
     
     if current_version >= target_version:
         logger.info(f"Database schema is up to date (version {current_version})")
         return
     
     logger.info(f"Migrating database from version {current_version} to {target_version}")
+    _ensure_schema_version_table(conn)
     cursor = conn.cursor()
     
     # Migration 1: Add mediaHash columns
     if current_version < 1:
         logger.info("Applying migration 1: Adding mediaHash columns...")
-        try:
-            cursor.execute("ALTER TABLE movies ADD COLUMN mediaHash TEXT")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_movies_hash ON movies(mediaHash)")
-        except sqlite3.OperationalError as e:
-            if "duplicate column" not in str(e).lower():
-                raise
-            logger.debug("movies.mediaHash already exists")
-        
-        try:
-            cursor.execute("ALTER TABLE episodes ADD COLUMN mediaHash TEXT")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_episodes_hash ON episodes(mediaHash)")
-        except sqlite3.OperationalError as e:
-            if "duplicate column" not in str(e).lower():
-                raise
-            logger.debug("episodes.mediaHash already exists")
-        
-        try:
-            cursor.execute("ALTER TABLE tracks ADD COLUMN mediaHash TEXT")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_tracks_hash ON tracks(mediaHash)")
-        except sqlite3.OperationalError as e:
-            if "duplicate column" not in str(e).lower():
-                raise
-            logger.debug("tracks.mediaHash already exists")
-        
-        set_schema_version(conn, 1)
+        # One transaction per migration: it applies fully or not at all
+        with transaction(conn):
+            for table_name in ("movies", "episodes", "tracks"):
+                add_missing_columns(conn, table_name, [("mediaHash", "TEXT")])
+                cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{table_name}_hash ON {table_name}(mediaHash)")
+            set_schema_version(conn, 1)
         logger.info("Migration 1 completed")
     
     # Migration 2: Add extended metadata columns
     if current_version < 2:
         logger.info("Applying migration 2: Adding extended metadata columns...")
-        
-        # Movies metadata
-        movie_columns = [
-            ("summary", "TEXT"),
-            ("tagline", "TEXT"),
-            ("genres", "TEXT"),
-            ("studio", "TEXT"),
-            ("directors", "TEXT"),
-            ("writers", "TEXT"),
-            ("producers", "TEXT"),
-            ("actors", "TEXT"),
-            ("originallyAvailableAt", "TEXT"),
-            ("rating", "REAL"),
-            ("audienceRating", "REAL")
-        ]
-        for col_name, col_type in movie_columns:
-            try:
-                cursor.execute(f"ALTER TABLE movies ADD COLUMN {col_name} {col_type}")
-            except sqlite3.OperationalError as e:
-                if "duplicate column" not in str(e).lower():
-                    raise
-                logger.debug(f"movies.{col_name} already exists")
-        
-        # TV Shows metadata
-        show_columns = [
-            ("summary", "TEXT"),
-            ("genres", "TEXT"),
-            ("studio", "TEXT"),
-            ("actors", "TEXT"),
-            ("originallyAvailableAt", "TEXT"),
-            ("rating", "REAL"),
-            ("audienceRating", "REAL")
-        ]
-        for col_name, col_type in show_columns:
-            try:
-                cursor.execute(f"ALTER TABLE tv_shows ADD COLUMN {col_name} {col_type}")
-            except sqlite3.OperationalError as e:
-                if "duplicate column" not in str(e).lower():
-                    raise
-                logger.debug(f"tv_shows.{col_name} already exists")
-        
-        # Seasons metadata
-        season_columns = [
-            ("summary", "TEXT"),
-            ("title", "TEXT"),
-            ("originallyAvailableAt", "TEXT")
-        ]
-        for col_name, col_type in season_columns:
-            try:
-                cursor.execute(f"ALTER TABLE seasons ADD COLUMN {col_name} {col_type}")
-            except sqlite3.OperationalError as e:
-                if "duplicate column" not in str(e).lower():
-                    raise
-                logger.debug(f"seasons.{col_name} already exists")
-        
-        # Episodes metadata
-        episode_columns = [
-            ("summary", "TEXT"),
-            ("originallyAvailableAt", "TEXT"),
-            ("directors", "TEXT"),
-            ("writers", "TEXT"),
-            ("actors", "TEXT"),
-            ("rating", "REAL"),
-            ("audienceRating", "REAL")
-        ]
-        for col_name, col_type in episode_columns:
-            try:
-                cursor.execute(f"ALTER TABLE episodes ADD COLUMN {col_name} {col_type}")
-            except sqlite3.OperationalError as e:
-                if "duplicate column" not in str(e).lower():
-                    raise
-                logger.debug(f"episodes.{col_name} already exists")
-        
-        # Artists metadata
-        artist_columns = [
-            ("summary", "TEXT"),
-            ("genres", "TEXT")
-        ]
-        for col_name, col_type in artist_columns:
-            try:
-                cursor.execute(f"ALTER TABLE artists ADD COLUMN {col_name} {col_type}")
-            except sqlite3.OperationalError as e:
-                if "duplicate column" not in str(e).lower():
-                    raise
-                logger.debug(f"artists.{col_name} already exists")
-        
-        # Albums metadata
-        album_columns = [
-            ("summary", "TEXT"),
-            ("genres", "TEXT"),
-            ("originallyAvailableAt", "TEXT"),
-            ("studio", "TEXT")
-        ]
-        for col_name, col_type in album_columns:
-            try:
-                cursor.execute(f"ALTER TABLE albums ADD COLUMN {col_name} {col_type}")
-            except sqlite3.OperationalError as e:
-                if "duplicate column" not in str(e).lower():
-                    raise
-                logger.debug(f"albums.{col_name} already exists")
-        
-        # Tracks metadata
-        track_columns = [
-            ("summary", "TEXT"),
-            ("originallyAvailableAt", "TEXT"),
-            ("genres", "TEXT")
-        ]
-        for col_name, col_type in track_columns:
-            try:
-                cursor.execute(f"ALTER TABLE tracks ADD COLUMN {col_name} {col_type}")
-            except sqlite3.OperationalError as e:
-                if "duplicate column" not in str(e).lower():
-                    raise
-                logger.debug(f"tracks.{col_name} already exists")
-        
-        set_schema_version(conn, 2)
+        metadata_columns = {
+            "movies": [
+                ("summary", "TEXT"),
+                ("tagline", "TEXT"),
+                ("genres", "TEXT"),
+                ("studio", "TEXT"),
+                ("directors", "TEXT"),
+                ("writers", "TEXT"),
+                ("producers", "TEXT"),
+                ("actors", "TEXT"),
+                ("originallyAvailableAt", "TEXT"),
+                ("rating", "REAL"),
+                ("audienceRating", "REAL")
+            ],
+            "tv_shows": [
+                ("summary", "TEXT"),
+                ("genres", "TEXT"),
+                ("studio", "TEXT"),
+                ("actors", "TEXT"),
+                ("originallyAvailableAt", "TEXT"),
+                ("rating", "REAL"),
+                ("audienceRating", "REAL")
+            ],
+            "seasons": [
+                ("summary", "TEXT"),
+                ("title", "TEXT"),
+                ("originallyAvailableAt", "TEXT")
+            ],
+            "episodes": [
+                ("summary", "TEXT"),
+                ("originallyAvailableAt", "TEXT"),
+                ("directors", "TEXT"),
+                ("writers", "TEXT"),
+                ("actors", "TEXT"),
+                ("rating", "REAL"),
+                ("audienceRating", "REAL")
+            ],
+            "artists": [
+                ("summary", "TEXT"),
+                ("genres", "TEXT")
+            ],
+            "albums": [
+                ("summary", "TEXT"),
+                ("genres", "TEXT"),
+                ("originallyAvailableAt", "TEXT"),
+                ("studio", "TEXT")
+            ],
+            "tracks": [
+                ("summary", "TEXT"),
+                ("originallyAvailableAt", "TEXT"),
+                ("genres", "TEXT")
+            ]
+        }
+        with transaction(conn):
+            for table_name, columns in metadata_columns.items():
+                add_missing_columns(conn, table_name, columns)
+            set_schema_version(conn, 2)
         logger.info("Migration 2 completed")
     
     # Migration 3: Add FTS5 search index (optional optimization)
     if current_version < 3:
         logger.info("Applying migration 3: Creating FTS5 search index...")
         try:
-            cursor.execute("""
-                CREATE VIRTUAL TABLE IF NOT EXISTS search_fts USING fts5(
-                    type,
-                    ratingKey UNINDEXED,
-                    title,
-                    summary,
-                    year UNINDEXED,
-                    available UNINDEXED,
-                    content='',
-                    content_rowid='ratingKey'
-                )
-            """)
-            
-            # Populate FTS5 table
-            cursor.execute("""
-                INSERT OR IGNORE INTO search_fts(type, ratingKey, title, summary, year, available)
-                SELECT 'movie', ratingKey, title, COALESCE(summary, ''), year, available
-                FROM movies WHERE available = 1
-            """)
-            
-            cursor.execute("""
-                INSERT OR IGNORE INTO search_fts(type, ratingKey, title, summary, year, available)
-                SELECT 'show', ratingKey, title, COALESCE(summary, ''), NULL, available
-                FROM tv_shows WHERE available = 1
-            """)
-            
-            cursor.execute("""
-                INSERT OR IGNORE INTO search_fts(type, ratingKey, title, summary, year, available)
-                SELECT 'artist', ratingKey, artistName, COALESCE(summary, ''), NULL, available
-                FROM artists WHERE available = 1
-            """)
-            
-            set_schema_version(conn, 3)
+            with transaction(conn):
+                cursor.execute("""
+                    CREATE VIRTUAL TABLE IF NOT EXISTS search_fts USING fts5(
+                        type,
+                        ratingKey UNINDEXED,
+                        title,
+                        summary,
+                        year UNINDEXED,
+                        available UNINDEXED,
+                        content='',
+                        content_rowid='ratingKey'
+                    )
+                """)
+                
+                # Populate FTS5 table
+                cursor.execute("""
+                    INSERT OR IGNORE INTO search_fts(type, ratingKey, title, summary, year, available)
+                    SELECT 'movie', ratingKey, title, COALESCE(summary, ''), year, available
+                    FROM movies WHERE available = 1
+                """)
+                
+                cursor.execute("""
+                    INSERT OR IGNORE INTO search_fts(type, ratingKey, title, summary, year, available)
+                    SELECT 'show', ratingKey, title, COALESCE(summary, ''), NULL, available
+                    FROM tv_shows WHERE available = 1
+                """)
+                
+                cursor.execute("""
+                    INSERT OR IGNORE INTO search_fts(type, ratingKey, title, summary, year, available)
+                    SELECT 'artist', ratingKey, artistName, COALESCE(summary, ''), NULL, available
+                    FROM artists WHERE available = 1
+                """)
+                
+                set_schema_version(conn, 3)
             logger.info("Migration 3 completed: FTS5 search index created")
         except sqlite3.OperationalError as e:
             if "fts5" in str(e).lower() or "no such module" in str(e).lower():
                 logger.warning("FTS5 not available in this SQLite build, skipping search optimization")
             else:
                 raise
-            set_schema_version(conn, 3)  # Mark as complete even if FTS5 unavailable
+            with transaction(conn):
+                set_schema_version(conn, 3)  # Mark as complete even if FTS5 unavailable
+    
+    # Migration 5: Generate season/episode *Human display columns in SQLite
+    if current_version < 5:
+        logger.info("Applying migration 5: Converting season/episode *Human columns to generated columns...")
+        with transaction(conn):
+            for table_name in ("seasons", "episodes"):
+                convert_to_generated_columns(conn, table_name)
+            set_schema_version(conn, 5)
+        logger.info("Migration 5 completed")
+    
+    # Migrations 4 and 6-9 rebuild search_fts: trigger-maintained (4), upsert-safe
+    # triggers (6), skipping no-op updates (7), external content (8) and the trigram
+    # tokenizer (9). create_search_index() always builds the latest layout, so one
+    # rebuild covers them all
+    if current_version < 9:
+        logger.info("Applying migration 9: Rebuilding FTS5 search index...")
+        rebuild_search_index(conn, 9)
+    
+    # Migration 10: Generate movie *Human display columns in SQLite
+    if current_version < 10:
+        logger.info("Applying migration 10: Converting movie *Human columns to generated columns...")
+        with transaction(conn):
+            convert_to_generated_columns(conn, "movies")
+            set_schema_version(conn, 10)
+        logger.info("Migration 10 completed")
+    
+    # Migration 11: Generate show/artist/album/track *Human display columns in SQLite
+    if current_version < 11:
+        logger.info("Applying migration 11: Converting show/artist/album/track *Human columns to generated columns...")
+        with transaction(conn):
+            for table_name in ("tv_shows", "artists", "albums", "tracks"):
+                convert_to_generated_columns(conn, table_name)
+            set_schema_version(conn, 11)
+        logger.info("Migration 11 completed")
+    
+    # Migration 12: Size columns round in integer math (matching human_readable_size())
+    if current_version < 12:
+        logger.info("Applying migration 12: Recreating generated *Human columns...")
+        with transaction(conn):
+            for table_name in GENERATED_HUMAN_COLUMNS:
+                convert_to_generated_columns(conn, table_name, redefine=True)
+            set_schema_version(conn, 12)
+        logger.info("Migration 12 completed")
+    
+
+# Lookup columns and sort order of the backend's "available items" listings (services/sqliteService.js)
+AVAILABLE_LISTING_INDEXES = {
+    "movies": ("title",),
+    "tv_shows": ("title",),
+    "seasons": ("showRatingKey", "seasonNumber"),
+    "episodes": ("seasonRatingKey", "episodeNumber"),
+    "artists": ("artistName",),
+    "albums": ("artistRatingKey", "year", "title"),
+    "tracks": ("albumRatingKey", "trackNumber"),
+}
+
+def create_indexes(conn):
+    """Create the secondary indexes and the FTS5 search index (idempotent).
+    
+    A new database gets these only after its initial load, so the bulk
+    inserts don't have to maintain every index (and the FTS triggers) row by row.
+    The parent-key indexes are not deferred: the TV rollup and the ON DELETE
+    CASCADE checks look children up by them during the load itself.
+    """
+    with transaction(conn):
+        cursor = conn.cursor()
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_movies_available ON movies(available)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_tv_shows_available ON tv_shows(available)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_seasons_available ON seasons(available)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_episodes_available ON episodes(available)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_artists_available ON artists(available)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_albums_available ON albums(available)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_tracks_available ON tracks(available)")
+        for table_name in ("movies", "episodes", "tracks"):
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{table_name}_hash ON {table_name}(mediaHash)")
+            # Superseded by the temp-table diff in find_changed_keys(), which no longer reads it
+            cursor.execute(f"DROP INDEX IF EXISTS idx_{table_name}_available_hash")
+        # Partial indexes for the backend's listings: only available rows, already in display order
+        for table_name, columns in AVAILABLE_LISTING_INDEXES.items():
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS idx_{table_name}_listing "
+                f"ON {table_name}({', '.join(columns)}) WHERE available = 1"
+            )
+    
+    # Create FTS5 virtual table for fast full-text search (optional but recommended)
+    # This significantly speeds up search queries on large libraries
+    try:
+        with transaction(conn):
+            create_search_index(conn)
+    except sqlite3.OperationalError as e:
+        # FTS5 might not be available in this SQLite build
+        logger.warning(f"FTS5 not available, search will use LIKE fallback: {e}")
 
 def init_database(db_path, rebuild=False):
-    """Initialize SQLite database with all required tables."""
-    logger = logging.getLogger(__name__)
+    """Initialize SQLite database with all required tables.
+    
+    Returns True for a new database, whose indexes are left for
+    create_indexes() once the initial load is done.
+    """
     
     if rebuild and os.path.exists(db_path):
         logger.warning(f"Rebuilding database: deleting {db_path}")
         os.remove(db_path)
+        # Stale WAL files would be replayed onto (or block opening) the new database
+        for suffix in ("-wal", "-shm"):
+            try:
+                os.remove(db_path + suffix)
+            except FileNotFoundError:
+                pass
     
-    conn = sqlite3.connect(db_path)
+    conn = open_connection(db_path)
     cursor = conn.cursor()
     
-    # Enable foreign keys
-    cursor.execute("PRAGMA foreign_keys = ON")
-    
     # Check current schema version
     current_version = get_schema_version(conn)
     logger.info(f"Current database schema version: {current_version}")
+    fresh = cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'movies'"
+    ).fetchone() is None
+    
+    # Tables and parent-key indexes
+    conn.executescript(SCHEMA_DDL)
+    
+    if fresh:
+        # Tables were just created at the latest schema, so there is nothing to migrate.
+        # Indexes and the search index are built after the first sync (see create_indexes)
+        with transaction(conn):
+            _ensure_schema_version_table(conn)
+            set_schema_version(conn, SCHEMA_VERSION)
+        logger.info("New database: indexes will be built after the initial load")
+    else:
+        # Run migrations if needed
+        run_migrations(conn, current_version, SCHEMA_VERSION)
+        create_indexes(conn)
     
-    # Movies table
-    # Note: duration/sizeBytes are raw values (milliseconds/bytes), durationHuman/sizeHuman are display-friendly
-    # mediaHash is a fingerprint to detect changes and skip unnecessary updates
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS movies (
-            ratingKey INTEGER PRIMARY KEY,
-            title TEXT NOT NULL,
-            year INTEGER,
-            contentRating TEXT,
-            duration INTEGER,  -- Raw duration in milliseconds
-            durationHuman TEXT,  -- Display-friendly duration (e.g., "120 mins")
-            audioCodec TEXT,
-            container TEXT,
-            videoCodec TEXT,
-            videoResolution TEXT,
-            sizeBytes INTEGER,  -- Raw size in bytes
-            sizeHuman TEXT,  -- Display-friendly size (e.g., "5.2 GB")
-            mediaHash TEXT,  -- Hash fingerprint to detect changes
-            summary TEXT,  -- Movie description/summary
-            tagline TEXT,  -- Movie tagline
-            genres TEXT,  -- CSV of genre names
-            studio TEXT,  -- Production studio
-            directors TEXT,  -- CSV of director names
-            writers TEXT,  -- CSV of writer names
-            producers TEXT,  -- CSV of producer names
-            actors TEXT,  -- CSV of actors formatted as "Name as Role"
-            originallyAvailableAt TEXT,  -- Original release date (ISO format)
-            rating REAL,  -- Rating (0-10 scale)
-            audienceRating REAL,  -- Audience rating (0-10 scale)
-            available INTEGER DEFAULT 1,
-            lastSeen TEXT DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
-    
-    # TV Shows table
-    # Note: avgEpisodeDuration/showSizeBytes are raw values, avgEpisodeDurationHuman/showSizeHuman are display-friendly
-    # CSV fields (avgVideoResolutions, etc.) aggregate values across all episodes for display
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS tv_shows (
-            ratingKey INTEGER PRIMARY KEY,
-            title TEXT NOT NULL,
-            contentRating TEXT,
-            avgEpisodeDuration INTEGER,  -- Raw average duration in milliseconds
-            avgEpisodeDurationHuman TEXT,  -- Display-friendly duration (e.g., "45 mins")
-            seasonCount INTEGER,
-            showTotalEpisode INTEGER,
-            showSizeBytes INTEGER,  -- Raw total size in bytes
-            showSizeHuman TEXT,  -- Display-friendly size (e.g., "500 GB")
-            avgVideoResolutions TEXT,  -- CSV of unique resolutions across episodes
-            avgAudioCodecs TEXT,  -- CSV of unique audio codecs
-            avgVideoCodecs TEXT,  -- CSV of unique video codecs
-            avgContainers TEXT,  -- CSV of unique containers
-            showYearRange TEXT,  -- Year range (e.g., "2020-2023" or "2023" for single year)
-            summary TEXT,  -- Show description/summary
-            genres TEXT,  -- CSV of genre names
-            studio TEXT,  -- Production studio
-            actors TEXT,  -- CSV of actors formatted as "Name as Role"
-            originallyAvailableAt TEXT,  -- Original release date (ISO format)
-            rating REAL,  -- Rating (0-10 scale)
-            audienceRating REAL,  -- Audience rating (0-10 scale)
-            available INTEGER DEFAULT 1,
-            lastSeen TEXT DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
-    
-    # Seasons table
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS seasons (
-            seasonRatingKey INTEGER PRIMARY KEY,
-            showRatingKey INTEGER NOT NULL,
-            seasonNumber INTEGER,
-            seasonTotalEpisode INTEGER,
-            avgSeasonEpisodeDuration INTEGER,
-            avgSeasonEpisodeDurationHuman TEXT,
-            seasonSizeBytes INTEGER,
-            seasonSizeHuman TEXT,
-            avgSeasonVideoResolution TEXT,
-            avgSeasonAudioCodec TEXT,
-            avgSeasonVideoCodec TEXT,
-            avgSeasonContainer TEXT,
-            yearRange TEXT,
-            summary TEXT,  -- Season description/summary
-            title TEXT,  -- Season title
-            originallyAvailableAt TEXT,  -- Original release date (ISO format)
-            available INTEGER DEFAULT 1,
-            lastSeen TEXT DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (showRatingKey) REFERENCES tv_shows(ratingKey) ON DELETE CASCADE
-        )
-    """)
-    
-    # Episodes table
-    # Note: mediaHash is a fingerprint to detect changes and skip unnecessary updates
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS episodes (
-            ratingKey INTEGER PRIMARY KEY,
-            seasonRatingKey INTEGER NOT NULL,
-            showRatingKey INTEGER NOT NULL,
-            episodeNumber INTEGER,
-            title TEXT,
-            year INTEGER,
-            duration INTEGER,
-            durationHuman TEXT,
-            audioCodec TEXT,
-            container TEXT,
-            videoCodec TEXT,
-            videoResolution TEXT,
-            sizeBytes INTEGER,
-            sizeHuman TEXT,
-            mediaHash TEXT,  -- Hash fingerprint to detect changes
-            summary TEXT,  -- Episode description/summary
-            originallyAvailableAt TEXT,  -- Original air date (ISO format)
-            directors TEXT,  -- CSV of director names
-            writers TEXT,  -- CSV of writer names
-            actors TEXT,  -- CSV of actors formatted as "Name as Role"
-            rating REAL,  -- Rating (0-10 scale)
-            audienceRating REAL,  -- Audience rating (0-10 scale)
-            available INTEGER DEFAULT 1,
-            lastSeen TEXT DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (seasonRatingKey) REFERENCES seasons(seasonRatingKey) ON DELETE CASCADE,
-            FOREIGN KEY (showRatingKey) REFERENCES tv_shows(ratingKey) ON DELETE CASCADE
-        )
-    """)
-    
-    # Artists table
-    # Note: totalSizeBytes is raw value, totalSizeHuman is display-friendly
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS artists (
-            ratingKey INTEGER PRIMARY KEY,
-            artistName TEXT NOT NULL,
-            totalAlbums INTEGER,
-            totalTracks INTEGER,
-            totalSizeBytes INTEGER,  -- Raw total size in bytes
-            totalSizeHuman TEXT,  -- Display-friendly size (e.g., "50 GB")
-            yearRange TEXT,  -- Year range (e.g., "2020-2023" or "2023" for single year)
-            summary TEXT,  -- Artist biography/description
-            genres TEXT,  -- CSV of genre names
-            available INTEGER DEFAULT 1,
-            lastSeen TEXT DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
-    
-    # Albums table
-    # Note: albumSizeBytes/albumDuration are raw values, albumSizeHuman/albumDurationHuman are display-friendly
-    # albumContainers is CSV of container types (may vary across tracks, usually not critical for UI)
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS albums (
-            ratingKey INTEGER PRIMARY KEY,
-            artistRatingKey INTEGER NOT NULL,
-            title TEXT NOT NULL,
-            year INTEGER,
-            tracks INTEGER,
-            albumSizeBytes INTEGER,  -- Raw total size in bytes
-            albumSizeHuman TEXT,  -- Display-friendly size (e.g., "500 MB")
-            albumDuration INTEGER,  -- Raw total duration in milliseconds
-            albumDurationHuman TEXT,  -- Display-friendly duration (e.g., "45 mins")
-            albumContainers TEXT,  -- CSV of container types (may vary per track)
-            summary TEXT,  -- Album description/summary
-            genres TEXT,  -- CSV of genre names
-            originallyAvailableAt TEXT,  -- Original release date (ISO format)
-            studio TEXT,  -- Record label/studio
-            available INTEGER DEFAULT 1,
-            lastSeen TEXT DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (artistRatingKey) REFERENCES artists(ratingKey) ON DELETE CASCADE
-        )
-    """)
-    
-    # Tracks table
-    # Note: duration/sizeBytes are raw values, durationHuman/sizeHuman are display-friendly
-    # mediaHash is a fingerprint to detect changes and skip unnecessary updates
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS tracks (
-            ratingKey INTEGER PRIMARY KEY,
-            albumRatingKey INTEGER NOT NULL,
-            artistRatingKey INTEGER NOT NULL,
-            title TEXT NOT NULL,
-            trackNumber INTEGER,
-            duration INTEGER,  -- Raw duration in milliseconds
-            durationHuman TEXT,  -- Display-friendly duration (e.g., "3 mins")
-            sizeBytes INTEGER,  -- Raw size in bytes
-            sizeHuman TEXT,  -- Display-friendly size (e.g., "5 MB")
-            container TEXT,
-            mediaHash TEXT,  -- Hash fingerprint to detect changes
-            summary TEXT,  -- Track description/summary (when available)
-            originallyAvailableAt TEXT,  -- Original release date (ISO format, when available)
-            genres TEXT,  -- CSV of genre names (when available)
-            available INTEGER DEFAULT 1,
-            lastSeen TEXT DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (albumRatingKey) REFERENCES albums(ratingKey) ON DELETE CASCADE,
-            FOREIGN KEY (artistRatingKey) REFERENCES artists(ratingKey) ON DELETE CASCADE
-        )
-    """)
-    
-    # Create indexes for better query performance
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_seasons_show ON seasons(showRatingKey)")
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_episodes_season ON episodes(seasonRatingKey)")
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_episodes_show ON episodes(showRatingKey)")
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_albums_artist ON albums(artistRatingKey)")
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_tracks_album ON tracks(albumRatingKey)")
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_tracks_artist ON tracks(artistRatingKey)")
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_movies_available ON movies(available)")
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_tv_shows_available ON tv_shows(available)")
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_seasons_available ON seasons(available)")
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_episodes_available ON episodes(available)")
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_artists_available ON artists(available)")
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_albums_available ON albums(available)")
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_tracks_available ON tracks(available)")
-    
-    # Create FTS5 virtual table for fast full-text search (optional but recommended)
-    # This significantly speeds up search queries on large libraries
-    try:
-        cursor.execute("""
-            CREATE VIRTUAL TABLE IF NOT EXISTS search_fts USING fts5(
-                type,
-                ratingKey UNINDEXED,
-                title,
-                summary,
-                year UNINDEXED,
-                available UNINDEXED,
-                content='',
-                content_rowid='ratingKey'
-            )
-        """)
-        
-        # Populate FTS5 table with data from all searchable tables
-        cursor.execute("""
-            INSERT INTO search_fts(type, ratingKey, title, summary, year, available)
-            SELECT 'movie', ratingKey, title, COALESCE(summary, ''), year, available
-            FROM movies WHERE available = 1
-        """)
-        
-        cursor.execute("""
-            INSERT INTO search_fts(type, ratingKey, title, summary, year, available)
-            SELECT 'show', ratingKey, title, COALESCE(summary, ''), NULL, available
-            FROM tv_shows WHERE available = 1
-        """)
-        
-        cursor.execute("""
-            INSERT INTO search_fts(type, ratingKey, title, summary, year, available)
-            SELECT 'artist', ratingKey, artistName, COALESCE(summary, ''), NULL, available
-            FROM artists WHERE available = 1
-        """)
-        
-        logger.info("FTS5 search index created and populated")
-    except sqlite3.OperationalError as e:
-        # FTS5 might not be available in this SQLite build
-        logger.warning(f"FTS5 not available, search will use LIKE fallback: {e}")
-    
-    conn.commit()
-    
-    # Run migrations if needed
-    run_migrations(conn, current_version, SCHEMA_VERSION)
-    
-    conn.close()
+    close_connection(conn)
     logger.info(f"Database initialized at {db_path}")
+    return fresh
+
+def executemany_batched(cursor, sql, rows, batch_size=None):
+    """executemany() over rows in batch_size slices (default BATCH_SIZE).
+    
+    Keeps each call's bound-parameter pass bounded on large libraries; the
+    slices still run in the caller's transaction, so a library is written
+    all or nothing.
+    """
+    batch_size = batch_size or BATCH_SIZE
+    for start in range(0, len(rows), batch_size):
+        cursor.executemany(sql, rows[start:start + batch_size])
+
+def has_available_rows(conn, table_name):
+    """True if table_name has at least one available row (False on a first sync)."""
+    return conn.execute(f"SELECT 1 FROM {table_name} WHERE available = 1 LIMIT 1").fetchone() is not None
 
-def mark_unavailable(conn, table_name, seen_keys, library_type, key_column="ratingKey"):
-    """Mark items as unavailable if they weren't seen in the current scan."""
-    logger = logging.getLogger(__name__)
+def find_changed_keys(conn, table_name, hashes):
+    """Return the ratingKeys from (ratingKey, mediaHash) pairs that need writing.
+    
+    A key needs writing when its row is missing, unavailable or stored with a
+    different hash. The pairs are staged in a temp table and diffed in one join,
+    instead of loading the table's hashes into Python.
+    """
+    # Nothing stored yet, so every key is new
+    if not has_available_rows(conn, table_name):
+        return {rating_key for rating_key, _ in hashes}
+    
+    with transaction(conn):
+        cursor = conn.cursor()
+        cursor.execute("CREATE TEMP TABLE staging_hashes (ratingKey INTEGER PRIMARY KEY, mediaHash TEXT)")
+        cursor.executemany("INSERT OR REPLACE INTO staging_hashes (ratingKey, mediaHash) VALUES (?, ?)", hashes)
+        cursor.execute(f"""
+            SELECT s.ratingKey FROM staging_hashes s
+            LEFT JOIN {table_name} t ON t.ratingKey = s.ratingKey AND t.available = 1
+            WHERE t.mediaHash IS NULL OR t.mediaHash != s.mediaHash
+        """)
+        changed = {row[0] for row in cursor}
+        cursor.execute("DROP TABLE staging_hashes")
+    return changed
+
+def mark_unavailable(conn, table_name, seen_keys, library_type, current_time=None, key_column="ratingKey"):
+    """Mark items as unavailable if they weren't seen in the current scan.
+    
+    Seen rows that the scan skipped as unchanged get their lastSeen stamped with
+    current_time. Runs inside the caller's transaction; nothing is committed here.
+    """
     cursor = conn.cursor()
     
     if not seen_keys:
@@ -1064,127 +1545,150 @@ def mark_unavailable(conn, table_name, seen_keys, library_type, key_column="rati
         cursor.execute(f"UPDATE {table_name} SET available = 0 WHERE available = 1")
         affected = cursor.rowcount
     else:
-        # Mark items not in seen list as unavailable
-        placeholders = ','.join('?' * len(seen_keys))
+        # Mark items not in seen list as unavailable. The keys go through a temp table
+        # rather than one bound parameter each, which large libraries would overflow
+        cursor.execute("CREATE TEMP TABLE IF NOT EXISTS seen_keys (k INTEGER PRIMARY KEY)")
+        cursor.executemany("INSERT OR IGNORE INTO seen_keys (k) VALUES (?)", ((key,) for key in seen_keys))
         cursor.execute(
-            f"UPDATE {table_name} SET available = 0 WHERE {key_column} NOT IN ({placeholders}) AND available = 1",
-            seen_keys
+            f"UPDATE {table_name} SET available = 0 "
+            f"WHERE available = 1 AND {key_column} NOT IN (SELECT k FROM seen_keys)"
         )
         affected = cursor.rowcount
+        if current_time is not None:
+            cursor.execute(
+                f"UPDATE {table_name} SET lastSeen = ? "
+                f"WHERE lastSeen IS NOT ? AND {key_column} IN (SELECT k FROM seen_keys)",
+                (current_time, current_time)
+            )
+        cursor.execute("DROP TABLE seen_keys")
     
-    conn.commit()
     if affected > 0:
         logger.info(f"  Marked {affected} {library_type} item(s) as unavailable")
+
+def _episode_csv(column, key_column, key):
+    """SQL subquery: sorted CSV of the distinct non-empty values of an episodes column."""
+    return f"""COALESCE((
+        SELECT GROUP_CONCAT(value, ', ') FROM (
+            SELECT DISTINCT {column} AS value FROM episodes
+            WHERE {key_column} = {key} AND available = 1 AND {column} != ''
+            ORDER BY value
+        )
+    ), '')"""
+
+def _episode_stats(key_column, parent_table, parent_key):
+    """SQL subquery: per-parent episode count, average duration, size and year range."""
+    return f"""(
+        SELECT p.{parent_key} AS parentKey,
+               COUNT(e.ratingKey) AS episodeCount,
+               COALESCE(SUM(e.duration) / COUNT(e.ratingKey), 0) AS avgDuration,
+               COALESCE(SUM(e.sizeBytes), 0) AS sizeBytes,
+               CASE
+                   WHEN MIN(NULLIF(e.year, 0)) IS NULL THEN NULL
+                   WHEN MIN(NULLIF(e.year, 0)) = MAX(e.year) THEN CAST(MIN(NULLIF(e.year, 0)) AS TEXT)
+                   ELSE MIN(NULLIF(e.year, 0)) || '-' || MAX(e.year)
+               END AS yearRange
+        FROM {parent_table} p
+        LEFT JOIN episodes e ON e.{key_column} = p.{parent_key} AND e.available = 1
+        WHERE p.available = 1
+        GROUP BY p.{parent_key}
+    )"""
+
+def rollup_tv_stats(conn):
+    """Recompute season and show totals from their available episodes in SQL."""
+    cursor = conn.cursor()
+    cursor.execute(f"""
+        UPDATE seasons SET
+            seasonTotalEpisode = stats.episodeCount,
+            avgSeasonEpisodeDuration = stats.avgDuration,
+            seasonSizeBytes = stats.sizeBytes,
+            avgSeasonVideoResolution = {_episode_csv('videoResolution', 'seasonRatingKey', 'seasons.seasonRatingKey')},
+            avgSeasonAudioCodec = {_episode_csv('audioCodec', 'seasonRatingKey', 'seasons.seasonRatingKey')},
+            avgSeasonVideoCodec = {_episode_csv('videoCodec', 'seasonRatingKey', 'seasons.seasonRatingKey')},
+            avgSeasonContainer = {_episode_csv('container', 'seasonRatingKey', 'seasons.seasonRatingKey')},
+            yearRange = stats.yearRange
+        FROM {_episode_stats('seasonRatingKey', 'seasons', 'seasonRatingKey')} AS stats
+        WHERE seasons.seasonRatingKey = stats.parentKey
+    """)
     
-    # Update FTS5 search index to reflect availability changes
-    try:
-        if table_name in ['movies', 'tv_shows', 'artists']:
-            type_map = {'movies': 'movie', 'tv_shows': 'show', 'artists': 'artist'}
-            fts_type = type_map.get(table_name)
-            if fts_type:
-                if not seen_keys:
-                    cursor.execute(f"""
-                        UPDATE search_fts 
-                        SET available = 0 
-                        WHERE type = ? AND available = 1
-                    """, (fts_type,))
-                else:
-                    placeholders = ','.join('?' * len(seen_keys))
-                    cursor.execute(f"""
-                        UPDATE search_fts 
-                        SET available = 0 
-                        WHERE type = ? AND ratingKey NOT IN ({placeholders}) AND available = 1
-                    """, [fts_type] + seen_keys)
-                conn.commit()
-    except sqlite3.OperationalError:
-        pass  # FTS5 table might not exist
+    # Shows without episodes keep Plex's own duration as their average
+    cursor.execute(f"""
+        UPDATE tv_shows SET
+            avgEpisodeDuration = CASE WHEN stats.episodeCount > 0
+                THEN stats.avgDuration ELSE tv_shows.avgEpisodeDuration END,
+            showTotalEpisode = stats.episodeCount,
+            showSizeBytes = stats.sizeBytes,
+            avgVideoResolutions = {_episode_csv('videoResolution', 'showRatingKey', 'tv_shows.ratingKey')},
+            avgAudioCodecs = {_episode_csv('audioCodec', 'showRatingKey', 'tv_shows.ratingKey')},
+            avgVideoCodecs = {_episode_csv('videoCodec', 'showRatingKey', 'tv_shows.ratingKey')},
+            avgContainers = {_episode_csv('container', 'showRatingKey', 'tv_shows.ratingKey')},
+            showYearRange = stats.yearRange
+        FROM {_episode_stats('showRatingKey', 'tv_shows', 'ratingKey')} AS stats
+        WHERE tv_shows.ratingKey = stats.parentKey
+    """)
 
-def process_movies(library: LibrarySection, plex_server: PlexServer, conn: sqlite3.Connection):
-    """Process movies library."""
-    logger = logging.getLogger(__name__)
-    logger.info(f"Processing {library.title} library...")
+class LibraryFetchError(Exception):
+    """A library listing still failed after its retries (already logged)."""
+
+def fetch_library_items(fetch_func, item_name, max_retries=3):
+    """Run a library listing call, retrying timeouts.
     
-    # Fetch movies with retry logic
-    movies = None
-    max_retries = 3
+    Raises LibraryFetchError (after logging) if Plex still times out after
+    max_retries attempts, so a failed fetch is never mistaken for an empty
+    library and the sync reports the library as failed.
+    """
     for attempt in range(max_retries):
         try:
-            logger.info(f"Fetching movies from library (attempt {attempt + 1}/{max_retries})...")
-            movies = library.all()
-            break
+            return fetch_func()
         except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
             if attempt < max_retries - 1:
                 wait_time = (attempt + 1) * 5
-                logger.warning(f"  Timeout fetching movies, retrying in {wait_time}s...")
+                logger.warning(f"  Timeout fetching {item_name}, retrying in {wait_time}s...")
                 time.sleep(wait_time)
                 continue
             else:
-                logger.error(f"Failed to fetch movies after {max_retries} attempts: {e}")
-                return
-    
-    if not movies:
-        logger.warning("No movies retrieved")
-        # Mark all movies as unavailable
-        mark_unavailable(conn, "movies", [], "movie")
-        return
-    
-    cursor = conn.cursor()
-    image_folder = IMAGE_FOLDERS.get("Movies")
-    os.makedirs(image_folder, exist_ok=True)
-    
-    total_count = len(movies)
-    logger.info(f"Found {total_count} movies. Processing...")
-    
-    seen_rating_keys = []
-    current_time = datetime.now().isoformat()
+                logger.error(f"Failed to fetch {item_name} after {max_retries} attempts: {e}")
+                raise LibraryFetchError(item_name) from e
+
+def fetch_library_page(library: LibrarySection, start: int, item_name: str, max_retries=3):
+    """Fetch LIBRARY_PAGE_SIZE items of a library from offset start, retrying timeouts.
+    
+    Returns an empty list past the end of the library; raises
+    LibraryFetchError if Plex still times out after max_retries attempts.
+    """
+    return fetch_library_items(
+        lambda: library.search(
+            container_start=start, container_size=LIBRARY_PAGE_SIZE,
+            maxresults=LIBRARY_PAGE_SIZE, includeGuids=False
+        ),
+        item_name, max_retries=max_retries
+    )
+
+def write_movie_batch(conn: sqlite3.Connection, scanned: list, image_folder: str,
+                      plex_server: PlexServer, current_time: str, image_stats: dict):
+    """Extract, download images for and write the new or changed movies of one scanned batch."""
     movies_data = []
     image_tasks = []
-    existing_hashes = {}  # Cache existing hashes to skip unchanged items
     
-    # Pre-fetch existing hashes for comparison
-    if not USE_PARALLEL:  # Only check hashes if not using parallel (to avoid extra DB queries)
-        cursor.execute("SELECT ratingKey, mediaHash FROM movies WHERE available = 1")
-        existing_hashes = {row[0]: row[1] for row in cursor.fetchall()}
+    # Let SQLite diff the fingerprints against the stored rows
+    changed_keys = find_changed_keys(
+        conn, "movies", [(entry[2], entry[-1]) for entry in scanned]
+    )
     
-    for idx, movie in enumerate(movies, 1):
+    # Second pass: full metadata only for new or changed movies
+    for (movie, part, rating_key, size_bytes, duration,
+         audio_codec, video_codec, video_resolution, media_hash) in scanned:
         try:
-            if idx % 50 == 0 or idx == total_count:
-                logger.info(f"  Progress: {idx}/{total_count} ({idx*100//total_count}%)")
+            image_path = f"{image_folder}/{rating_key}.thumb.webp"
             
-            # Get media info
-            media = movie.media[0] if movie.media else None
-            if not media:
-                logger.warning(f"  Skipping movie '{movie.title}': no media found")
-                continue
-                
-            part = media.parts[0] if media.parts else None
-            if not part:
-                logger.warning(f"  Skipping movie '{movie.title}': no media parts found")
-                continue
-            
-            rating_key = validate_rating_key(movie.ratingKey)
-            seen_rating_keys.append(rating_key)
-            
-            size_bytes = part.size or 0
-            duration = movie.duration or 0
-            audio_codec = format_codec(media.audioCodec)
-            video_codec = format_codec(media.videoCodec)
-            video_resolution = format_resolution(media.videoResolution)
-            
-            # Calculate media hash to detect changes
-            media_hash = calculate_media_hash(
-                size_bytes, duration, video_codec, video_resolution,
-                part.container, movie.title, movie.year
-            )
-            
-            # Skip if unchanged (only if not using parallel mode for efficiency)
-            if not USE_PARALLEL and rating_key in existing_hashes and existing_hashes[rating_key] == media_hash:
-                logger.debug(f"  Skipping unchanged movie '{movie.title}' (ratingKey: {rating_key})")
+            # Skip metadata extraction if unchanged (the image only if it's missing)
+            if rating_key not in changed_keys:
+                logger.debug("  Skipping unchanged movie '%s' (ratingKey: %s)", movie.title, rating_key)
+                if DOWNLOAD_IMAGES and not os.path.exists(image_path):
+                    image_tasks.append((movie, image_path, plex_server))
                 continue
             
             # Prepare image download task
             if DOWNLOAD_IMAGES:
-                image_path = os.path.join(image_folder, f"{rating_key}.thumb.webp")
                 image_tasks.append((movie, image_path, plex_server))
             
             # Extract metadata
@@ -1201,20 +1705,18 @@ def process_movies(library: LibrarySection, plex_server: PlexServer, conn: sqlit
             audience_rating = extract_audience_rating(movie)
             
             # Collect movie data for batch insert
-            # Note: duration/sizeBytes are raw values, durationHuman/sizeHuman are display-friendly
+            # Note: durationHuman/sizeHuman are generated by SQLite from duration/sizeBytes
             movies_data.append((
                 rating_key,
                 movie.title,
                 movie.year,
                 movie.contentRating,
                 duration,  # Raw duration in milliseconds
-                human_readable_duration(duration) if duration else None,  # Display-friendly
                 audio_codec,
                 part.container,
                 video_codec,
                 video_resolution,
                 size_bytes,  # Raw size in bytes
-                human_readable_size(size_bytes),  # Display-friendly
                 media_hash,  # Hash fingerprint
                 summary,
                 tagline,
@@ -1241,51 +1743,131 @@ def process_movies(library: LibrarySection, plex_server: PlexServer, conn: sqlit
     if DOWNLOAD_IMAGES and image_tasks:
         logger.info("Downloading images (this may take a while)...")
         if USE_PARALLEL:
-            image_stats = download_images_parallel(image_tasks, max_workers=10)
+            batch_stats = download_images_parallel(image_tasks, max_workers=10)
+            image_stats['downloaded'] += batch_stats['downloaded']
+            image_stats['failed'] += batch_stats['failed']
         else:
-            image_stats = {'downloaded': 0, 'failed': 0}
             for movie, image_path, plex_server in image_tasks:
                 if download_and_convert_image(movie, image_path, plex_server):
                     image_stats['downloaded'] += 1
                 else:
                     image_stats['failed'] += 1
                     logger.warning(f"  Image download failed for movie '{movie.title if hasattr(movie, 'title') else 'unknown'}'")
-    else:
-        image_stats = {'downloaded': 0, 'failed': 0}
-    
-    # Batch insert all movies
-    if movies_data:
-        cursor.executemany("""
-            INSERT OR REPLACE INTO movies (
-                ratingKey, title, year, contentRating, duration, durationHuman,
-                audioCodec, container, videoCodec, videoResolution,
-                sizeBytes, sizeHuman, mediaHash, summary, tagline, genres,
-                studio, directors, writers, producers, actors,
-                originallyAvailableAt, rating, audienceRating,
-                available, lastSeen
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, movies_data)
-        conn.commit()
-        logger.info(f"  Inserted/updated {len(movies_data)} movies")
+    
+    with transaction(conn):
+        if movies_data:
+            executemany_batched(conn.cursor(), MOVIE_INSERT_SQL, movies_data)
+            logger.info(f"  Inserted/updated {len(movies_data)} movies")
+
+def process_movies(library: LibrarySection, plex_server: PlexServer, conn: sqlite3.Connection):
+    """Process movies library.
+    
+    Movies are fetched a page at a time and written every BATCH_SIZE, so only
+    one batch of Plex objects is held in memory however large the library is.
+    """
+    logger.info(f"Processing {library.title} library...")
+    
+    total_count = library.totalSize
+    if not total_count:
+        logger.warning("No movies retrieved")
+        # Mark all movies as unavailable
+        with transaction(conn):
+            mark_unavailable(conn, "movies", [], "movie")
+        return
+    
+    image_folder = IMAGE_FOLDERS.get("Movies")
+    logger.info(f"Found {total_count} movies. Processing...")
+    
+    seen_rating_keys = []
+    current_time = datetime.now().isoformat()
+    image_stats = {'downloaded': 0, 'failed': 0}
+    scanned = []
+    idx = 0
+    # Progress is logged at doubling intervals (50, 100, 200, ...) and at the end
+    next_log_at = 50
+    
+    # First pass: fingerprint every movie from the media info Plex already returned
+    while True:
+        movies = fetch_library_page(library, idx, "movies")
+        if not movies:
+            break
         
-        # Update FTS5 search index if it exists
-        try:
-            cursor.executemany("""
-                INSERT OR REPLACE INTO search_fts(type, ratingKey, title, summary, year, available)
-                VALUES ('movie', ?, ?, COALESCE(?, ''), ?, ?)
-            """, [(row[0], row[1], row[14], row[2], 1) for row in movies_data])
-        except sqlite3.OperationalError:
-            pass  # FTS5 table might not exist
+        for movie in movies:
+            idx += 1
+            try:
+                if idx == next_log_at or idx == total_count:
+                    logger.info(f"  Progress: {idx}/{total_count} ({idx*100//total_count}%)")
+                    next_log_at *= 2
+                
+                # Get media info
+                media = movie.media[0] if movie.media else None
+                if not media:
+                    logger.warning(f"  Skipping movie '{movie.title}': no media found")
+                    continue
+                
+                part = media.parts[0] if media.parts else None
+                if not part:
+                    logger.warning(f"  Skipping movie '{movie.title}': no media parts found")
+                    continue
+                
+                rating_key = validate_rating_key(movie.ratingKey)
+                seen_rating_keys.append(rating_key)
+                
+                size_bytes = part.size or 0
+                duration = movie.duration or 0
+                audio_codec = format_codec(media.audioCodec)
+                video_codec = format_codec(media.videoCodec)
+                video_resolution = format_resolution(media.videoResolution)
+                
+                # Calculate media hash to detect changes
+                media_hash = calculate_media_hash(
+                    size_bytes, duration, video_codec, video_resolution,
+                    part.container, movie.title, movie.year
+                )
+                scanned.append((movie, part, rating_key, size_bytes, duration,
+                                audio_codec, video_codec, video_resolution, media_hash))
+            except ValueError as e:
+                logger.error(f"  Error processing movie '{movie.title if hasattr(movie, 'title') else 'unknown'}': {e}")
+                continue
+            except Exception as e:
+                logger.error(f"  Unexpected error processing movie '{movie.title if hasattr(movie, 'title') else 'unknown'}': {e}", exc_info=True)
+                continue
+            
+            # Write each full batch as soon as it has been scanned
+            if len(scanned) >= BATCH_SIZE:
+                write_movie_batch(conn, scanned, image_folder, plex_server, current_time, image_stats)
+                scanned = []
+    
+    if scanned:
+        write_movie_batch(conn, scanned, image_folder, plex_server, current_time, image_stats)
     
     # Mark unavailable movies
-    mark_unavailable(conn, "movies", seen_rating_keys, "movie")
+    with transaction(conn):
+        mark_unavailable(conn, "movies", seen_rating_keys, "movie", current_time)
     
     logger.info(f"\nProcessed {len(seen_rating_keys)} movies")
     logger.info(f"Images: {image_stats['downloaded']} downloaded, {image_stats['failed']} failed")
 
+def fetch_show_children(show):
+    """Fetch a show's seasons and its episodes grouped by season ratingKey."""
+    seasons_list = fetch_with_retry(
+        lambda: show.seasons(),
+        f"seasons for {show.title}",
+        max_retries=3
+    )
+    
+    # One request for all of the show's episodes instead of one per season
+    episodes_by_season = defaultdict(list)
+    for episode in fetch_with_retry(
+        lambda: show.episodes(),
+        f"episodes for {show.title}",
+        max_retries=3
+    ):
+        episodes_by_season[episode.parentRatingKey].append(episode)
+    return seasons_list, episodes_by_season
+
 def process_tvshows(library: LibrarySection, plex_server: PlexServer, conn: sqlite3.Connection):
     """Process TV shows library with full episode support."""
-    logger = logging.getLogger(__name__)
     logger.info(f"Processing {library.title} library...")
     
     # Fetch shows with retry logic
@@ -1294,7 +1876,7 @@ def process_tvshows(library: LibrarySection, plex_server: PlexServer, conn: sqli
     for attempt in range(max_retries):
         try:
             logger.info(f"Fetching shows from library (attempt {attempt + 1}/{max_retries})...")
-            shows = library.all()
+            shows = library.all(container_size=LIBRARY_PAGE_SIZE, includeGuids=False)
             break
         except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
             if attempt < max_retries - 1:
@@ -1304,26 +1886,26 @@ def process_tvshows(library: LibrarySection, plex_server: PlexServer, conn: sqli
                 continue
             else:
                 logger.error(f"Failed to fetch shows after {max_retries} attempts: {e}")
-                return
+                raise LibraryFetchError("shows") from e
     
     if not shows:
         logger.warning("No shows retrieved")
         # Mark all as unavailable
-        mark_unavailable(conn, "tv_shows", [], "show")
-        mark_unavailable(conn, "seasons", [], "season")
-        mark_unavailable(conn, "episodes", [], "episode")
+        with transaction(conn):
+            mark_unavailable(conn, "tv_shows", [], "show")
+            mark_unavailable(conn, "seasons", [], "season")
+            mark_unavailable(conn, "episodes", [], "episode")
         return
     
     cursor = conn.cursor()
     image_folder = IMAGE_FOLDERS.get("TV Shows")
-    os.makedirs(image_folder, exist_ok=True)
     
     total_count = len(shows)
     logger.info(f"Found {total_count} shows. Processing...")
     
-    seen_show_keys = []
-    seen_season_keys = []
-    seen_episode_keys = []
+    seen_show_keys = set()
+    seen_season_keys = set()
+    seen_episode_keys = set()
     current_time = datetime.now().isoformat()
     
     # Collect data for batch inserts
@@ -1335,116 +1917,90 @@ def process_tvshows(library: LibrarySection, plex_server: PlexServer, conn: sqli
     show_image_tasks = []
     season_image_tasks = []
     episode_image_tasks = []
+    # Episode thumbnails fetched by process_season itself (sequential mode)
+    episode_image_stats = {'downloaded': 0, 'failed': 0}
+    
+    # Seasons are processed concurrently (their thumbnails are network bound); all writes stay on this thread
+    season_executor = ThreadPoolExecutor(max_workers=SEASON_WORKERS if USE_PARALLEL else 1)
+    
+    # Seasons and episodes of upcoming shows are fetched ahead while earlier shows are processed.
+    # The look-ahead is a bounded window, so only that many shows' episodes are held at once
+    fetch_workers = SHOW_FETCH_WORKERS if USE_PARALLEL else 1
+    fetch_executor = ThreadPoolExecutor(max_workers=fetch_workers)
+    shows_to_fetch = iter(shows)
+    show_children = deque(
+        fetch_executor.submit(fetch_show_children, show)
+        for _, show in zip(range(fetch_workers * 2), shows_to_fetch)
+    )
+    
+    # Progress is logged at doubling intervals (10, 20, 40, ...) and at the end
+    next_log_at = 10
     
-    # Pre-fetch existing episode hashes for comparison
-    existing_episode_hashes = {}
-    if not USE_PARALLEL:
-        cursor.execute("SELECT ratingKey, mediaHash FROM episodes WHERE available = 1")
-        existing_episode_hashes = {row[0]: row[1] for row in cursor.fetchall()}
+    # On a first sync there are no stored hashes to look up per show
+    episodes_stored = has_available_rows(conn, "episodes")
     
     for idx, show in enumerate(shows, 1):
+        # Take this show's fetch off the window and start the next one
+        children = show_children.popleft()
+        next_show = next(shows_to_fetch, None)
+        if next_show is not None:
+            show_children.append(fetch_executor.submit(fetch_show_children, next_show))
         try:
-            if idx % 10 == 0 or idx == total_count:
+            if idx == next_log_at or idx == total_count:
                 logger.info(f"  Progress: {idx}/{total_count} ({idx*100//total_count}%)")
+                next_log_at *= 2
             
             show_rating_key = validate_rating_key(show.ratingKey)
-            seen_show_keys.append(show_rating_key)
+            seen_show_keys.add(show_rating_key)
             
-            show_size_bytes = 0
-            show_total_episodes = 0
-            show_years = []
-            show_video_resolutions = []
-            show_audio_codecs = []
-            show_video_codecs = []
-            show_containers = []
-            show_total_duration = 0
+            # Stored hashes for this show only, so unchanged episodes can be skipped
+            existing_episode_hashes = dict(cursor.execute(
+                "SELECT ratingKey, mediaHash FROM episodes WHERE showRatingKey = ? AND available = 1",
+                (show_rating_key,)
+            )) if episodes_stored else {}
             
-            # Fetch seasons with retry
-            seasons_list = fetch_with_retry(
-                lambda: show.seasons(),
-                f"seasons for {show.title}",
-                max_retries=3
-            )
+            seasons_list, episodes_by_season = children.result()
             
-            for season in seasons_list:
-                season_rating_key = validate_rating_key(season.ratingKey)
-                seen_season_keys.append(season_rating_key)
-                
-                # Process season (handles episodes internally)
-                episode_image_stats = {'downloaded': 0, 'failed': 0}
-                season_result = process_season(
+            # Process seasons (episodes are handled inside process_season)
+            # Each season gets its own image stats dict, so workers share no mutable state
+            season_results = list(season_executor.map(
+                lambda season: process_season(
                     season, show_rating_key, image_folder,
-                    plex_server, current_time, episode_image_stats
-                )
-                
-                # Filter episodes by hash if not using parallel
-                filtered_episodes = []
-                for ep_data in season_result['episodes_data']:
-                    ep_rating_key = ep_data[0]  # ratingKey is first element
-                    seen_episode_keys.append(ep_rating_key)
-                    
-                    # Skip if unchanged (only if not using parallel mode)
-                    if not USE_PARALLEL and ep_rating_key in existing_episode_hashes:
-                        # mediaHash is at index 14 (after sizeHuman at 13)
-                        if len(ep_data) > 14 and ep_data[14] == existing_episode_hashes[ep_rating_key]:
-                            logger.debug(f"    Skipping unchanged episode (ratingKey: {ep_rating_key})")
-                            continue
-                    
-                    filtered_episodes.append(ep_data)
-                
-                # Update counters
-                season_total_episodes = len(filtered_episodes)
-                show_total_episodes += season_total_episodes
+                    plex_server, current_time, {'downloaded': 0, 'failed': 0},
+                    existing_hashes=existing_episode_hashes,
+                    episodes=episodes_by_season.get(season.ratingKey, [])
+                ),
+                seasons_list
+            ))
+            
+            for season, season_result in zip(seasons_list, season_results):
+                season_rating_key = validate_rating_key(season.ratingKey)
+                seen_season_keys.add(season_rating_key)
                 
-                # Recalculate season stats based on filtered episodes
-                if filtered_episodes:
-                    # Recalculate totals from filtered episodes
-                    season_total_duration = sum(ep[6] for ep in filtered_episodes)  # duration at index 6
-                    season_size_bytes = sum(ep[12] for ep in filtered_episodes)  # sizeBytes at index 12
-                    show_total_duration += season_total_duration
-                    show_size_bytes += season_size_bytes
-                    
-                    # Update season data with correct totals
-                    season_data_list = list(season_result['season_data'])
-                    season_data_list[3] = season_total_episodes  # seasonTotalEpisode
-                    season_data_list[4] = season_total_duration // season_total_episodes if season_total_episodes > 0 else 0  # avgSeasonEpisodeDuration
-                    season_data_list[5] = human_readable_duration(season_data_list[4]) if season_data_list[4] > 0 else None  # avgSeasonEpisodeDurationHuman
-                    season_data_list[6] = season_size_bytes  # seasonSizeBytes
-                    season_data_list[7] = human_readable_size(season_size_bytes)  # seasonSizeHuman
-                    seasons_data.append(tuple(season_data_list))
-                else:
-                    # Keep original season data even if no episodes
-                    seasons_data.append(season_result['season_data'])
+                # Unchanged episodes are seen but have no row to write
+                seen_episode_keys.update(season_result['episode_keys'])
+                episode_image_stats['downloaded'] += season_result['image_stats']['downloaded']
+                episode_image_stats['failed'] += season_result['image_stats']['failed']
+                episodes_data.extend(season_result['episodes_data'])
                 
-                # Collect episode data
-                episodes_data.extend(filtered_episodes)
+                seasons_data.append(season_result['season_data'])
                 
                 # Collect episode image tasks for parallel download
                 if USE_PARALLEL and DOWNLOAD_IMAGES:
                     episode_image_tasks.extend(season_result.get('episode_image_tasks', []))
                 
-                # Aggregate show-level stats
-                show_video_resolutions.extend(season_result['video_resolutions'])
-                show_audio_codecs.extend(season_result['audio_codecs'])
-                show_video_codecs.extend(season_result['video_codecs'])
-                show_containers.extend(season_result['containers'])
-                show_years.extend(season_result['years'])
-                
                 # Collect season image task for parallel download
                 if DOWNLOAD_IMAGES:
-                    season_image_path = os.path.join(image_folder, f"{season_rating_key}.thumb.webp")
+                    season_image_path = f"{image_folder}/{season_rating_key}.thumb.webp"
                     season_image_tasks.append((season, season_image_path, plex_server))
             
             # Collect show image task for parallel download
             if DOWNLOAD_IMAGES:
-                image_path = os.path.join(image_folder, f"{show_rating_key}.thumb.webp")
+                image_path = f"{image_folder}/{show_rating_key}.thumb.webp"
                 show_image_tasks.append((show, image_path, plex_server))
             
-            # Calculate average episode duration for show
-            avg_show_duration = show_total_duration // show_total_episodes if show_total_episodes > 0 else (show.duration or 0)
-            
-            # Format year range (handles single year case)
-            show_year_range = format_year_range(show_years)
+            # Plex's own duration is kept as the average when the show has no episodes
+            avg_show_duration = show.duration or 0
             
             # Extract metadata
             summary = extract_summary(show)
@@ -1456,22 +2012,21 @@ def process_tvshows(library: LibrarySection, plex_server: PlexServer, conn: sqli
             audience_rating = extract_audience_rating(show)
             
             # Collect show data for batch insert
-            # Note: avgEpisodeDuration/showSizeBytes are raw values, avgEpisodeDurationHuman/showSizeHuman are display-friendly
+            # Note: avgEpisodeDurationHuman/showSizeHuman are generated by SQLite from the raw values
+            # Episode totals, averages and CSVs are filled in by rollup_tv_stats() after insert
             shows_data.append((
                 show_rating_key,
                 show.title,
                 show.contentRating,
                 avg_show_duration,  # Raw average duration in milliseconds
-                human_readable_duration(avg_show_duration) if avg_show_duration else None,  # Display-friendly
                 show.seasonCount,
-                show_total_episodes,
-                show_size_bytes,  # Raw total size in bytes
-                human_readable_size(show_size_bytes),  # Display-friendly
-                ", ".join(sorted(set([r for r in show_video_resolutions if r]))),  # CSV of unique values
-                ", ".join(sorted(set([c for c in show_audio_codecs if c]))),
-                ", ".join(sorted(set([c for c in show_video_codecs if c]))),
-                ", ".join(sorted(set([c for c in show_containers if c]))),
-                show_year_range,
+                0,  # showTotalEpisode
+                0,  # showSizeBytes
+                "",  # avgVideoResolutions
+                "",  # avgAudioCodecs
+                "",  # avgVideoCodecs
+                "",  # avgContainers
+                None,  # showYearRange
                 summary,
                 genres,
                 studio,
@@ -1490,6 +2045,9 @@ def process_tvshows(library: LibrarySection, plex_server: PlexServer, conn: sqli
             logger.error(f"  Unexpected error processing show '{show.title if hasattr(show, 'title') else 'unknown'}': {e}", exc_info=True)
             continue
     
+    season_executor.shutdown()
+    fetch_executor.shutdown()
+    
     # Download images in parallel or sequentially
     if DOWNLOAD_IMAGES:
         logger.info("Downloading images (this may take a while)...")
@@ -1521,8 +2079,8 @@ def process_tvshows(library: LibrarySection, plex_server: PlexServer, conn: sqli
                 else:
                     season_images_failed += 1
             
-            episode_images_downloaded = 0
-            episode_images_failed = 0
+            episode_images_downloaded = episode_image_stats['downloaded']
+            episode_images_failed = episode_image_stats['failed']
             for episode, image_path, plex_server in episode_image_tasks:
                 if download_and_convert_image(episode, image_path, plex_server):
                     episode_images_downloaded += 1
@@ -1533,50 +2091,30 @@ def process_tvshows(library: LibrarySection, plex_server: PlexServer, conn: sqli
         season_images_downloaded = season_images_failed = 0
         episode_images_downloaded = episode_images_failed = 0
     
-    # Batch insert all data (order matters due to foreign keys: shows -> seasons -> episodes)
-    if shows_data:
-        cursor.executemany("""
-            INSERT OR REPLACE INTO tv_shows (
-                ratingKey, title, contentRating, avgEpisodeDuration, avgEpisodeDurationHuman,
-                seasonCount, showTotalEpisode, showSizeBytes, showSizeHuman,
-                avgVideoResolutions, avgAudioCodecs, avgVideoCodecs,
-                avgContainers, showYearRange, summary, genres, studio, actors,
-                originallyAvailableAt, rating, audienceRating,
-                available, lastSeen
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, shows_data)
-        logger.info(f"  Inserted/updated {len(shows_data)} shows")
-    
-    if seasons_data:
-        cursor.executemany("""
-            INSERT OR REPLACE INTO seasons (
-                seasonRatingKey, showRatingKey, seasonNumber, seasonTotalEpisode,
-                avgSeasonEpisodeDuration, avgSeasonEpisodeDurationHuman,
-                seasonSizeBytes, seasonSizeHuman, avgSeasonVideoResolution,
-                avgSeasonAudioCodec, avgSeasonVideoCodec, avgSeasonContainer,
-                yearRange, summary, title, originallyAvailableAt, available, lastSeen
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, seasons_data)
-        logger.info(f"  Inserted/updated {len(seasons_data)} seasons")
-    
-    if episodes_data:
-        cursor.executemany("""
-            INSERT OR REPLACE INTO episodes (
-                ratingKey, seasonRatingKey, showRatingKey, episodeNumber, title, year,
-                duration, durationHuman, audioCodec, container, videoCodec,
-                videoResolution, sizeBytes, sizeHuman, mediaHash, summary,
-                originallyAvailableAt, directors, writers, actors,
-                rating, audienceRating, available, lastSeen
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, episodes_data)
-        logger.info(f"  Inserted/updated {len(episodes_data)} episodes")
-    
-    conn.commit()
-    
-    # Mark unavailable items
-    mark_unavailable(conn, "tv_shows", seen_show_keys, "show")
-    mark_unavailable(conn, "seasons", seen_season_keys, "season")
-    mark_unavailable(conn, "episodes", seen_episode_keys, "episode")
+    # Batch insert all data in one transaction, parents first: shows -> seasons -> episodes.
+    # Foreign keys are checked at COMMIT rather than per row, so the order of
+    # arrival within the transaction doesn't matter (the pragma resets on commit)
+    with transaction(conn):
+        cursor.execute("PRAGMA defer_foreign_keys = ON")
+        if shows_data:
+            executemany_batched(cursor, SHOW_INSERT_SQL, shows_data)
+            logger.info(f"  Inserted/updated {len(shows_data)} shows")
+        
+        if seasons_data:
+            executemany_batched(cursor, SEASON_INSERT_SQL, seasons_data)
+            logger.info(f"  Inserted/updated {len(seasons_data)} seasons")
+        
+        if episodes_data:
+            executemany_batched(cursor, EPISODE_INSERT_SQL, episodes_data)
+            logger.info(f"  Inserted/updated {len(episodes_data)} episodes")
+        
+        # Mark unavailable items
+        mark_unavailable(conn, "tv_shows", seen_show_keys, "show", current_time)
+        mark_unavailable(conn, "seasons", seen_season_keys, "season", current_time, key_column="seasonRatingKey")
+        mark_unavailable(conn, "episodes", seen_episode_keys, "episode", current_time)
+        
+        # Season and show totals come from the available episodes now in the table
+        rollup_tv_stats(conn)
     
     logger.info(f"\nProcessed {len(seen_show_keys)} shows")
     if DOWNLOAD_IMAGES:
@@ -1589,46 +2127,46 @@ def process_tvshows(library: LibrarySection, plex_server: PlexServer, conn: sqli
 
 def process_music(library: LibrarySection, plex_server: PlexServer, conn: sqlite3.Connection):
     """Process music library with full track support."""
-    logger = logging.getLogger(__name__)
     logger.info(f"Processing {library.title} library...")
     
-    # Fetch artists with retry logic
-    artists = None
-    max_retries = 3
-    for attempt in range(max_retries):
-        try:
-            logger.info(f"Fetching artists from library (attempt {attempt + 1}/{max_retries})...")
-            artists = library.all()
-            break
-        except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
-            if attempt < max_retries - 1:
-                wait_time = (attempt + 1) * 5
-                logger.warning(f"  Timeout fetching artists, retrying in {wait_time}s...")
-                time.sleep(wait_time)
-                continue
-            else:
-                logger.error(f"Failed to fetch artists after {max_retries} attempts: {e}")
-                return
+    artists = fetch_library_items(
+        lambda: library.all(container_size=LIBRARY_PAGE_SIZE, includeGuids=False), "artists"
+    )
     
     if not artists:
         logger.warning("No artists retrieved")
         # Mark all as unavailable
-        mark_unavailable(conn, "artists", [], "artist")
-        mark_unavailable(conn, "albums", [], "album")
-        mark_unavailable(conn, "tracks", [], "track")
+        with transaction(conn):
+            mark_unavailable(conn, "artists", [], "artist")
+            mark_unavailable(conn, "albums", [], "album")
+            mark_unavailable(conn, "tracks", [], "track")
         return
     
     cursor = conn.cursor()
     image_folder = IMAGE_FOLDERS.get("Music")
-    os.makedirs(image_folder, exist_ok=True)
     
     total_count = len(artists)
     logger.info(f"Found {total_count} artists. Processing...")
     
+    # Every album and track in two paged listings instead of one request per artist and per album
+    albums = fetch_library_items(
+        lambda: library.searchAlbums(container_size=LIBRARY_PAGE_SIZE, includeGuids=False), "albums"
+    )
+    tracks = fetch_library_items(
+        lambda: library.searchTracks(container_size=LIBRARY_PAGE_SIZE, includeGuids=False), "tracks"
+    )
+    albums_by_artist = defaultdict(list)
+    for album in albums:
+        albums_by_artist[album.parentRatingKey].append(album)
+    tracks_by_album = defaultdict(list)
+    for track in tracks:
+        tracks_by_album[track.parentRatingKey].append(track)
+    del albums, tracks
+    
     # Track seen items for availability marking
-    seen_artist_keys = []
-    seen_album_keys = []
-    seen_track_keys = []
+    seen_artist_keys = set()
+    seen_album_keys = set()
+    seen_track_keys = set()
     current_time = datetime.now().isoformat()
     
     # Collect data for batch inserts
@@ -1640,24 +2178,31 @@ def process_music(library: LibrarySection, plex_server: PlexServer, conn: sqlite
     artist_image_tasks = []
     album_image_tasks = []
     
-    # Pre-fetch existing track hashes for comparison
-    existing_track_hashes = {}
-    if not USE_PARALLEL:
-        cursor.execute("SELECT ratingKey, mediaHash FROM tracks WHERE available = 1")
-        existing_track_hashes = {row[0]: row[1] for row in cursor.fetchall()}
+    # Progress is logged at doubling intervals (10, 20, 40, ...) and at the end
+    next_log_at = 10
+    
+    # On a first sync there are no stored hashes to look up per artist
+    tracks_stored = has_available_rows(conn, "tracks")
     
     for idx, artist in enumerate(artists, 1):
         try:
-            if idx % 10 == 0 or idx == total_count:
+            if idx == next_log_at or idx == total_count:
                 logger.info(f"  Progress: {idx}/{total_count} ({idx*100//total_count}%)")
+                next_log_at *= 2
             
             artist_name = artist.title
             artist_rating_key = validate_rating_key(artist.ratingKey)
-            seen_artist_keys.append(artist_rating_key)
+            seen_artist_keys.add(artist_rating_key)
+            
+            # Stored hashes for this artist only, so unchanged tracks can be skipped
+            existing_track_hashes = dict(cursor.execute(
+                "SELECT ratingKey, mediaHash FROM tracks WHERE artistRatingKey = ? AND available = 1",
+                (artist_rating_key,)
+            )) if tracks_stored else {}
             
             # Collect artist image task for parallel download
             if DOWNLOAD_IMAGES:
-                image_path = os.path.join(image_folder, f"{artist_rating_key}.thumb.webp")
+                image_path = f"{image_folder}/{artist_rating_key}.thumb.webp"
                 artist_image_tasks.append((artist, image_path, plex_server))
             
             # Track artist totals
@@ -1666,50 +2211,28 @@ def process_music(library: LibrarySection, plex_server: PlexServer, conn: sqlite
             artist_total_albums = 0
             artist_years = []
             
-            # Fetch albums with retry
-            albums_list = fetch_with_retry(
-                lambda: artist.albums(),
-                f"albums for {artist_name}",
-                max_retries=3
-            )
-            
-            for album in albums_list or []:
+            for album in albums_by_artist.get(artist_rating_key, []):
                 album_rating_key = validate_rating_key(album.ratingKey)
-                seen_album_keys.append(album_rating_key)
+                seen_album_keys.add(album_rating_key)
                 
                 # Process album and tracks
                 album_result, album_size_bytes, album_duration = process_album(
                     album, image_folder, plex_server, artist_rating_key, current_time,
-                    seen_track_keys, existing_track_hashes
+                    seen_track_keys, existing_track_hashes,
+                    tracks=tracks_by_album.get(album_rating_key, [])
                 )
                 
-                # Filter tracks by hash if not using parallel
-                filtered_tracks = []
-                for track_data in album_result['tracks_data']:
-                    track_rating_key = track_data[0]  # ratingKey is first element
-                    if track_rating_key not in seen_track_keys:
-                        seen_track_keys.append(track_rating_key)
-                    
-                    # Skip if unchanged (only if not using parallel mode)
-                    if not USE_PARALLEL and track_rating_key in existing_track_hashes:
-                        # mediaHash is at index 10 (after container)
-                        if len(track_data) > 10 and track_data[10] == existing_track_hashes[track_rating_key]:
-                            logger.debug(f"    Skipping unchanged track (ratingKey: {track_rating_key})")
-                            continue
-                    
-                    filtered_tracks.append(track_data)
-                
-                # Collect track and album data
-                tracks_data.extend(filtered_tracks)
+                # Collect track and album data (unchanged tracks were already skipped)
+                tracks_data.extend(album_result['tracks_data'])
                 albums_data.append(album_result['album_data'])
                 
-            # Collect album image task for parallel download
-            if DOWNLOAD_IMAGES:
-                album_image_path = os.path.join(image_folder, f"{album_rating_key}.thumb.webp")
-                album_image_tasks.append((album, album_image_path, plex_server))
+                # Collect album image task (every album, not just the artist's last one)
+                if DOWNLOAD_IMAGES:
+                    album_image_path = f"{image_folder}/{album_rating_key}.thumb.webp"
+                    album_image_tasks.append((album, album_image_path, plex_server))
                 
                 artist_total_size_bytes += album_size_bytes
-                artist_total_tracks += len(filtered_tracks)
+                artist_total_tracks += album_result['tracks']
                 artist_total_albums += 1
                 artist_years.append(album.year)
             
@@ -1721,14 +2244,13 @@ def process_music(library: LibrarySection, plex_server: PlexServer, conn: sqlite
             genres = extract_genres(artist)
             
             # Collect artist data for batch insert
-            # Note: totalSizeBytes is raw value, totalSizeHuman is display-friendly
+            # Note: totalSizeHuman is generated by SQLite from totalSizeBytes
             artists_data.append((
                 artist_rating_key,
                 artist_name,
                 artist_total_albums,
                 artist_total_tracks,
                 artist_total_size_bytes,  # Raw total size in bytes
-                human_readable_size(artist_total_size_bytes),  # Display-friendly
                 year_range,
                 summary,
                 genres,
@@ -1769,45 +2291,24 @@ def process_music(library: LibrarySection, plex_server: PlexServer, conn: sqlite
                 else:
                     album_images_failed += 1
     
-    # Batch insert all data (order matters due to foreign keys: artists -> albums -> tracks)
-    if artists_data:
-        cursor.executemany("""
-            INSERT OR REPLACE INTO artists (
-                ratingKey, artistName, totalAlbums, totalTracks,
-                totalSizeBytes, totalSizeHuman, yearRange, summary, genres,
-                available, lastSeen
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, artists_data)
-        logger.info(f"  Inserted/updated {len(artists_data)} artists")
-    
-    if albums_data:
-        cursor.executemany("""
-            INSERT OR REPLACE INTO albums (
-                ratingKey, artistRatingKey, title, year, tracks,
-                albumSizeBytes, albumSizeHuman, albumDuration, albumDurationHuman,
-                albumContainers, summary, genres, originallyAvailableAt, studio,
-                available, lastSeen
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, albums_data)
-        logger.info(f"  Inserted/updated {len(albums_data)} albums")
-    
-    if tracks_data:
-        cursor.executemany("""
-            INSERT OR REPLACE INTO tracks (
-                ratingKey, albumRatingKey, artistRatingKey, title, trackNumber,
-                duration, durationHuman, sizeBytes, sizeHuman, container,
-                mediaHash, summary, originallyAvailableAt, genres,
-                available, lastSeen
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, tracks_data)
-        logger.info(f"  Inserted/updated {len(tracks_data)} tracks")
-    
-    conn.commit()
-    
-    # Mark unavailable items
-    mark_unavailable(conn, "artists", seen_artist_keys, "artist")
-    mark_unavailable(conn, "albums", seen_album_keys, "album")
-    mark_unavailable(conn, "tracks", seen_track_keys, "track")
+    # Batch insert all data in one transaction (order matters due to foreign keys: artists -> albums -> tracks)
+    with transaction(conn):
+        if artists_data:
+            executemany_batched(cursor, ARTIST_INSERT_SQL, artists_data)
+            logger.info(f"  Inserted/updated {len(artists_data)} artists")
+        
+        if albums_data:
+            executemany_batched(cursor, ALBUM_INSERT_SQL, albums_data)
+            logger.info(f"  Inserted/updated {len(albums_data)} albums")
+        
+        if tracks_data:
+            executemany_batched(cursor, TRACK_INSERT_SQL, tracks_data)
+            logger.info(f"  Inserted/updated {len(tracks_data)} tracks")
+        
+        # Mark unavailable items
+        mark_unavailable(conn, "artists", seen_artist_keys, "artist", current_time)
+        mark_unavailable(conn, "albums", seen_album_keys, "album", current_time)
+        mark_unavailable(conn, "tracks", seen_track_keys, "track", current_time)
     
     logger.info(f"\nProcessed {len(seen_artist_keys)} artists")
     if DOWNLOAD_IMAGES and not USE_PARALLEL:
@@ -1815,10 +2316,13 @@ def process_music(library: LibrarySection, plex_server: PlexServer, conn: sqlite
         logger.info(f"Album images: {album_images_downloaded} downloaded, {album_images_failed} failed")
 
 def process_album(album: Album, image_folder: str, plex_server: PlexServer, 
-                 artist_rating_key: int, current_time: str, seen_track_keys: list,
-                 existing_track_hashes=None):
-    """Process a single album and its tracks, returning data for batch insert."""
-    logger = logging.getLogger(__name__)
+                 artist_rating_key: int, current_time: str, seen_track_keys: set,
+                 existing_track_hashes=None, tracks=None):
+    """Process a single album and its tracks, returning data for batch insert.
+    
+    tracks, when given, are the album's already-fetched tracks; otherwise they
+    are requested from Plex.
+    """
     if existing_track_hashes is None:
         existing_track_hashes = {}
     
@@ -1829,29 +2333,22 @@ def process_album(album: Album, image_folder: str, plex_server: PlexServer,
     track_count = 0
     tracks_data = []
     
-    # Track image stats locally (not mutated externally)
-    image_stats = {'downloaded': 0, 'failed': 0}
-    
-    # Download and convert album thumbnail (only if not using parallel mode)
-    if not (USE_PARALLEL and DOWNLOAD_IMAGES):
-        image_path = os.path.join(image_folder, f"{album_rating_key}.thumb.webp")
-        if DOWNLOAD_IMAGES and download_and_convert_image(album, image_path, plex_server):
-            image_stats['downloaded'] += 1
-        else:
-            image_stats['failed'] += 1
+    # The album thumbnail is queued by process_music with the artist images
     
-    # Fetch tracks with retry
-    tracks_list = fetch_with_retry(
-        lambda: album.tracks(),
-        f"tracks for album {album.title}",
-        max_retries=3
-    )
+    # Fetch tracks with retry unless the caller already has them
+    if tracks is not None:
+        tracks_list = tracks
+    else:
+        tracks_list = fetch_with_retry(
+            lambda: album.tracks(),
+            f"tracks for album {album.title}",
+            max_retries=3
+        )
     
     # Process each track
     for track in tracks_list or []:
         track_rating_key = validate_rating_key(track.ratingKey)
-        if track_rating_key not in seen_track_keys:
-            seen_track_keys.append(track_rating_key)
+        seen_track_keys.add(track_rating_key)
         track_count += 1
         
         track_size_bytes = 0
@@ -1859,7 +2356,8 @@ def process_album(album: Album, image_folder: str, plex_server: PlexServer,
         track_container = None
         
         for media in track.media:
-            containers.add(media.container)
+            if media.container:
+                containers.add(media.container)
             track_duration = media.duration or 0
             total_duration += track_duration
             for part in media.parts:
@@ -1875,13 +2373,18 @@ def process_album(album: Album, image_folder: str, plex_server: PlexServer,
             track_container, track.title, album.year
         )
         
+        # Skip metadata extraction if unchanged (album totals above still count it)
+        if existing_track_hashes.get(track_rating_key) == media_hash:
+            logger.debug("    Skipping unchanged track (ratingKey: %s)", track_rating_key)
+            continue
+        
         # Extract track metadata
         track_summary = extract_summary(track)
         track_originally_available = extract_originally_available(track)
         track_genres = extract_genres(track)
         
         # Collect track data for batch insert
-        # Note: duration/sizeBytes are raw values, durationHuman/sizeHuman are display-friendly
+        # Note: durationHuman/sizeHuman are generated by SQLite from duration/sizeBytes
         tracks_data.append((
             track_rating_key,
             album_rating_key,
@@ -1889,9 +2392,7 @@ def process_album(album: Album, image_folder: str, plex_server: PlexServer,
             track.title,
             track.index,
             track_duration,  # Raw duration in milliseconds
-            human_readable_duration(track_duration) if track_duration else None,  # Display-friendly
             track_size_bytes,  # Raw size in bytes
-            human_readable_size(track_size_bytes),  # Display-friendly
             track_container,
             media_hash,  # Hash fingerprint
             track_summary,
@@ -1908,7 +2409,7 @@ def process_album(album: Album, image_folder: str, plex_server: PlexServer,
     album_studio = extract_studio(album)
     
     # Prepare album data for batch insert
-    # Note: albumSizeBytes/albumDuration are raw values, albumSizeHuman/albumDurationHuman are display-friendly
+    # Note: albumSizeHuman/albumDurationHuman are generated by SQLite from the raw values
     # albumContainers is CSV (may vary per track, usually not critical for UI)
     album_data = (
         album_rating_key,
@@ -1917,9 +2418,7 @@ def process_album(album: Album, image_folder: str, plex_server: PlexServer,
         album.year,
         track_count,
         album_size_bytes,  # Raw total size in bytes
-        human_readable_size(album_size_bytes),  # Display-friendly
         total_duration,  # Raw total duration in milliseconds
-        human_readable_duration(total_duration) if total_duration else None,  # Display-friendly
         ", ".join(sorted(containers)),  # CSV of container types
         album_summary,
         album_genres,
@@ -1931,11 +2430,40 @@ def process_album(album: Album, image_folder: str, plex_server: PlexServer,
     
     return {
         "tracks": track_count,
-        "image_stats": image_stats,
         "tracks_data": tracks_data,
         "album_data": album_data
     }, album_size_bytes, total_duration
 
+def sync_library(plex, library_name):
+    """Sync one Plex library on a dedicated database connection.
+    
+    Returns True on success; failures are logged and return False.
+    """
+    conn = open_connection(DB_PATH)
+    try:
+        library = plex.library.section(library_name)
+        logger.info(f"\n{'='*50}")
+        logger.info(f"Processing library: {library_name}")
+        logger.info(f"{'='*50}")
+        
+        if library_name == "Movies":
+            process_movies(library, plex, conn)
+        elif library_name == "TV Shows":
+            process_tvshows(library, plex, conn)
+        elif library_name == "Music":
+            process_music(library, plex, conn)
+        else:
+            logger.warning(f"Unknown library type: {library_name}")
+            return False
+        return True
+    except LibraryFetchError:
+        return False  # Already logged by fetch_library_items
+    except Exception as e:
+        logger.error(f"Error processing library {library_name}: {e}", exc_info=True)
+        return False
+    finally:
+        close_connection(conn)
+
 def main():
     """Main function to sync all libraries from Plex."""
     # Parse CLI arguments
@@ -1955,11 +2483,18 @@ def main():
         logger.error("PLEX_URL and PLEX_TOKEN environment variables must be set")
         return 1
     
-    # Ensure database directory exists
+    if sqlite3.sqlite_version_info < MIN_SQLITE_VERSION:
+        required = ".".join(map(str, MIN_SQLITE_VERSION))
+        logger.error(f"SQLite {required}+ is required (this Python uses SQLite {sqlite3.sqlite_version})")
+        return 1
+    
+    # Ensure database and image directories exist (images are written without further checks)
     os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
+    for image_folder in IMAGE_FOLDERS.values():
+        os.makedirs(image_folder, exist_ok=True)
     
     # Initialize database
-    init_database(DB_PATH, rebuild=args.rebuild_db)
+    indexes_pending = init_database(DB_PATH, rebuild=args.rebuild_db)
     
     logger.info(f"Connecting to Plex server at {PLEX_URL}...")
     try:
@@ -1972,39 +2507,39 @@ def main():
         logger.info("  3. Check if Plex server is running")
         return 1
     
-    # Connect to database
-    conn = sqlite3.connect(DB_PATH)
-    # Enable foreign keys for this connection
-    conn.execute("PRAGMA foreign_keys = ON")
+    # Libraries touch disjoint tables, so each syncs on its own thread and
+    # connection; their write transactions are serialized (see transaction())
+    try:
+        with ThreadPoolExecutor(max_workers=len(LIBRARY_NAMES) if USE_PARALLEL else 1) as executor:
+            results = list(executor.map(lambda name: sync_library(plex, name), LIBRARY_NAMES))
+    finally:
+        shutdown_encoder_pool()
+    failed_libraries = [name for name, ok in zip(LIBRARY_NAMES, results) if not ok]
+    
+    conn = open_connection(DB_PATH)
     
     try:
-        # Process each library
-        for library_name in LIBRARY_NAMES:
-            try:
-                library = plex.library.section(library_name)
-                logger.info(f"\n{'='*50}")
-                logger.info(f"Processing library: {library_name}")
-                logger.info(f"{'='*50}")
-                
-                if library_name == "Movies":
-                    process_movies(library, plex, conn)
-                elif library_name == "TV Shows":
-                    process_tvshows(library, plex, conn)
-                elif library_name == "Music":
-                    process_music(library, plex, conn)
-                else:
-                    logger.warning(f"Unknown library type: {library_name}")
-            except Exception as e:
-                logger.error(f"Error processing library {library_name}: {e}", exc_info=True)
-                continue
+        # A new database is indexed once, after everything has been loaded
+        if indexes_pending:
+            logger.info("\nBuilding indexes...")
+            create_indexes(conn)
+        
+        # Planner statistics are kept current by PRAGMA optimize in close_connection();
+        # a newly built database gets one full ANALYZE
+        if indexes_pending:
+            logger.info("\nAnalyzing database...")
+            conn.execute("ANALYZE")
         
-        # Optimize database after sync
-        logger.info("\nOptimizing database...")
-        conn.execute("VACUUM")
-        conn.execute("ANALYZE")
-        logger.info("Database optimization complete")
+        if args.vacuum:
+            logger.info("\nVacuuming database...")
+            conn.execute("VACUUM")
+            logger.info("Vacuum complete")
     finally:
-        conn.close()
+        close_connection(conn)
+    
+    if failed_libraries:
+        logger.error(f"Sync finished with errors in: {', '.join(failed_libraries)}")
+        return 1
     
     logger.info("\n" + "="*50)
     logger.info("Sync complete!")
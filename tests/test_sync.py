@@ -0,0 +1,529 @@
+"""
+Tests for the sync script's database layer.
+
+Plex objects are stood in for by SimpleNamespace fakes carrying just the
+attributes the process_* functions read; every test runs against a fresh
+SQLite database in a temporary directory.
+"""
+
+import contextlib
+import io
+import os
+import sys
+import sqlite3
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import plex_sync
+
+
+# --- Fake Plex objects ----------------------------------------------------
+
+def fake_media(size_bytes, duration=60000, container="mkv"):
+    """A media entry with a single part."""
+    return SimpleNamespace(
+        parts=[SimpleNamespace(size=size_bytes, container=container)],
+        audioCodec="aac", videoCodec="h264", videoResolution="1080",
+        container=container, duration=duration, bitrate=1000, audioChannels=2
+    )
+
+
+def fake_item(rating_key, title, **attrs):
+    """A Plex item with empty metadata, overridden by attrs."""
+    item = dict(
+        ratingKey=rating_key, title=title, summary="", tagline=None, genres=[],
+        studio=None, directors=[], writers=[], producers=[], roles=[],
+        originallyAvailableAt=None, rating=None, audienceRating=None,
+        thumb=None, updatedAt=None, year=2020, contentRating="PG", duration=60000
+    )
+    item.update(attrs)
+    return SimpleNamespace(**item)
+
+
+def fake_movie(rating_key, title=None, size_bytes=1000):
+    return fake_item(rating_key, title or f"Movie {rating_key}", media=[fake_media(size_bytes, 7200000)])
+
+
+def fake_show(rating_key, episode_sizes):
+    """A show whose seasons hold episodes of the given sizes ([[season 1 sizes], ...])."""
+    seasons, episodes = [], []
+    for season_number, sizes in enumerate(episode_sizes, 1):
+        # Keys derive from the numbering, so they stay stable across resyncs
+        season_key = rating_key + 100 * season_number
+        season_episodes = []
+        for episode_number, size_bytes in enumerate(sizes, 1):
+            season_episodes.append(fake_item(
+                season_key + episode_number, f"Episode {episode_number}", parentRatingKey=season_key,
+                index=episode_number, media=[fake_media(size_bytes)]
+            ))
+        episodes += season_episodes
+        seasons.append(fake_item(
+            season_key, f"Season {season_number}", seasonNumber=season_number,
+            index=season_number, episodes=lambda found=season_episodes: found
+        ))
+    return fake_item(
+        rating_key, f"Show {rating_key}", seasonCount=len(seasons),
+        seasons=lambda: seasons, episodes=lambda: episodes
+    )
+
+
+def fake_artist(rating_key, track_sizes):
+    """An artist whose albums hold tracks of the given sizes ([[album 1 sizes], ...])."""
+    albums = []
+    for album_number, sizes in enumerate(track_sizes, 1):
+        album_key = rating_key + 100 * album_number
+        tracks = [
+            fake_item(
+                album_key + track_number, f"Track {track_number}", index=track_number,
+                parentRatingKey=album_key, grandparentRatingKey=rating_key,
+                media=[fake_media(size_bytes, 180000, "flac")]
+            )
+            for track_number, size_bytes in enumerate(sizes, 1)
+        ]
+        albums.append(fake_item(
+            album_key, f"Album {album_number}", parentRatingKey=rating_key,
+            tracks=lambda found=tracks: found
+        ))
+    return fake_item(rating_key, f"Artist {rating_key}", albums=lambda: albums)
+
+
+def fake_library(items):
+    """A library section that pages through items like LibrarySection.search()."""
+    def search(container_start=0, container_size=None, maxresults=None, **kwargs):
+        return items[container_start:container_start + maxresults]
+    # Music libraries also list every album and track in one call each
+    albums = [album for item in items if hasattr(item, "albums") for album in item.albums()]
+    tracks = [track for album in albums for track in album.tracks()]
+    return SimpleNamespace(
+        title="Test", key="1", type="test", totalSize=len(items),
+        search=search, all=lambda **kwargs: items,
+        searchAlbums=lambda **kwargs: albums, searchTracks=lambda **kwargs: tracks
+    )
+
+
+FAKE_SERVER = SimpleNamespace(url=lambda *args, **kwargs: "http://plex")
+
+
+# Tables as created by the original (version 0) schema, with stored *Human columns
+BASELINE_DDL = """
+    CREATE TABLE movies (
+        ratingKey INTEGER PRIMARY KEY, title TEXT NOT NULL, year INTEGER, contentRating TEXT,
+        duration INTEGER, durationHuman TEXT, audioCodec TEXT, container TEXT, videoCodec TEXT,
+        videoResolution TEXT, sizeBytes INTEGER, sizeHuman TEXT,
+        available INTEGER DEFAULT 1, lastSeen TEXT DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE tv_shows (
+        ratingKey INTEGER PRIMARY KEY, title TEXT NOT NULL, contentRating TEXT,
+        avgEpisodeDuration INTEGER, avgEpisodeDurationHuman TEXT, seasonCount INTEGER,
+        showTotalEpisode INTEGER, showSizeBytes INTEGER, showSizeHuman TEXT,
+        avgVideoResolutions TEXT, avgAudioCodecs TEXT, avgVideoCodecs TEXT, avgContainers TEXT,
+        showYearRange TEXT, available INTEGER DEFAULT 1, lastSeen TEXT DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE seasons (
+        seasonRatingKey INTEGER PRIMARY KEY, showRatingKey INTEGER NOT NULL, seasonNumber INTEGER,
+        seasonTotalEpisode INTEGER, avgSeasonEpisodeDuration INTEGER, avgSeasonEpisodeDurationHuman TEXT,
+        seasonSizeBytes INTEGER, seasonSizeHuman TEXT, avgSeasonVideoResolution TEXT,
+        avgSeasonAudioCodec TEXT, avgSeasonVideoCodec TEXT, avgSeasonContainer TEXT, yearRange TEXT,
+        available INTEGER DEFAULT 1, lastSeen TEXT DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (showRatingKey) REFERENCES tv_shows(ratingKey) ON DELETE CASCADE
+    );
+    CREATE TABLE episodes (
+        ratingKey INTEGER PRIMARY KEY, seasonRatingKey INTEGER NOT NULL, showRatingKey INTEGER NOT NULL,
+        episodeNumber INTEGER, title TEXT, year INTEGER, duration INTEGER, durationHuman TEXT,
+        audioCodec TEXT, container TEXT, videoCodec TEXT, videoResolution TEXT,
+        sizeBytes INTEGER, sizeHuman TEXT, available INTEGER DEFAULT 1,
+        lastSeen TEXT DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (seasonRatingKey) REFERENCES seasons(seasonRatingKey) ON DELETE CASCADE,
+        FOREIGN KEY (showRatingKey) REFERENCES tv_shows(ratingKey) ON DELETE CASCADE
+    );
+    CREATE TABLE artists (
+        ratingKey INTEGER PRIMARY KEY, artistName TEXT NOT NULL, totalAlbums INTEGER,
+        totalTracks INTEGER, totalSizeBytes INTEGER, totalSizeHuman TEXT, yearRange TEXT,
+        available INTEGER DEFAULT 1, lastSeen TEXT DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE albums (
+        ratingKey INTEGER PRIMARY KEY, artistRatingKey INTEGER NOT NULL, title TEXT NOT NULL,
+        year INTEGER, tracks INTEGER, albumSizeBytes INTEGER, albumSizeHuman TEXT,
+        albumDuration INTEGER, albumDurationHuman TEXT, albumContainers TEXT,
+        available INTEGER DEFAULT 1, lastSeen TEXT DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (artistRatingKey) REFERENCES artists(ratingKey) ON DELETE CASCADE
+    );
+    CREATE TABLE tracks (
+        ratingKey INTEGER PRIMARY KEY, albumRatingKey INTEGER NOT NULL, artistRatingKey INTEGER NOT NULL,
+        title TEXT NOT NULL, trackNumber INTEGER, duration INTEGER, durationHuman TEXT,
+        sizeBytes INTEGER, sizeHuman TEXT, container TEXT,
+        available INTEGER DEFAULT 1, lastSeen TEXT DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (albumRatingKey) REFERENCES albums(ratingKey) ON DELETE CASCADE,
+        FOREIGN KEY (artistRatingKey) REFERENCES artists(ratingKey) ON DELETE CASCADE
+    );
+"""
+
+
+# --- Fixtures -------------------------------------------------------------
+
+@pytest.fixture(autouse=True)
+def no_images(monkeypatch):
+    """Keep the tests off the network."""
+    monkeypatch.setattr(plex_sync, "DOWNLOAD_IMAGES", False)
+
+
+@pytest.fixture
+def conn(tmp_path):
+    """A connection to a freshly initialized database."""
+    db_path = str(tmp_path / "plex_collection.db")
+    plex_sync.init_database(db_path)
+    connection = plex_sync.open_connection(db_path)
+    yield connection
+    connection.close()
+
+
+def insert_movies(conn, rows):
+    """Insert (ratingKey, mediaHash, available) movie rows directly."""
+    with plex_sync.transaction(conn):
+        conn.executemany(
+            "INSERT INTO movies (ratingKey, title, mediaHash, available, lastSeen) "
+            "VALUES (?, 'Movie', ?, ?, 'before')",
+            rows
+        )
+
+
+# --- Change detection -----------------------------------------------------
+
+def test_find_changed_keys_on_empty_table(conn):
+    """With nothing stored, every key needs writing."""
+    assert plex_sync.find_changed_keys(conn, "movies", [(1, "a"), (2, "b")]) == {1, 2}
+
+
+def test_find_changed_keys(conn):
+    """New, changed and unavailable rows need writing; unchanged rows don't."""
+    insert_movies(conn, [(1, "a", 1), (2, "b", 1), (3, "c", 0)])
+    hashes = [(1, "a"), (2, "changed"), (3, "c"), (4, "new")]
+    assert plex_sync.find_changed_keys(conn, "movies", hashes) == {2, 3, 4}
+
+
+def test_mark_unavailable(conn):
+    """Only available rows missing from the scan are marked unavailable."""
+    insert_movies(conn, [(1, "a", 1), (2, "b", 1), (3, "c", 1)])
+    with plex_sync.transaction(conn):
+        plex_sync.mark_unavailable(conn, "movies", {1, 3}, "movie")
+    assert dict(conn.execute("SELECT ratingKey, available FROM movies")) == {1: 1, 2: 0, 3: 1}
+
+    with plex_sync.transaction(conn):
+        plex_sync.mark_unavailable(conn, "movies", set(), "movie")
+    assert conn.execute("SELECT COUNT(*) FROM movies WHERE available = 1").fetchone()[0] == 0
+
+
+def test_resync_marks_removed_and_skips_unchanged(conn):
+    """A resync marks removed movies unavailable and only restamps unchanged rows."""
+    movies = [fake_movie(key) for key in (1, 2, 3)]
+    plex_sync.process_movies(fake_library(movies), FAKE_SERVER, conn)
+    first_seen = dict(conn.execute("SELECT ratingKey, lastSeen FROM movies"))
+
+    # Movie 2 is removed from Plex and movie 3's file is replaced
+    resync = [fake_movie(1), fake_movie(3, size_bytes=2000)]
+    plex_sync.process_movies(fake_library(resync), FAKE_SERVER, conn)
+
+    rows = {key: (available, size, last_seen) for key, available, size, last_seen in conn.execute(
+        "SELECT ratingKey, available, sizeBytes, lastSeen FROM movies"
+    )}
+    assert rows[1][:2] == (1, 1000)
+    assert rows[2] == (0, 1000, first_seen[2])
+    assert rows[3][:2] == (1, 2000)
+    # Both re-seen movies carry this sync's timestamp, whether rewritten or skipped
+    assert rows[1][2] == rows[3][2] > first_seen[1]
+
+
+# --- Media hash and display formatting ------------------------------------
+
+HASH_ARGS = (5_000_000_000, 7_200_000, "HEVC", "4K", "mkv", "Heat", 1995)
+
+
+def test_media_hash_is_stable():
+    digest = plex_sync.calculate_media_hash(*HASH_ARGS)
+    assert digest == plex_sync.calculate_media_hash(*HASH_ARGS)
+    assert len(digest) == 16 and int(digest, 16) >= 0
+
+
+@pytest.mark.parametrize("position, value", [
+    (0, 5_000_000_001), (1, 7_200_001), (2, "H264"), (3, "1080p"),
+    (4, "mp4"), (5, "Heat 2"), (6, 1996),
+])
+def test_media_hash_changes_with_each_field(position, value):
+    changed = list(HASH_ARGS)
+    changed[position] = value
+    assert plex_sync.calculate_media_hash(*changed) != plex_sync.calculate_media_hash(*HASH_ARGS)
+
+
+def test_media_hash_field_order():
+    """The same values in different fields fingerprint differently."""
+    assert plex_sync.calculate_media_hash(1, 2, "a", "b", "c", "t", 3) != \
+        plex_sync.calculate_media_hash(2, 1, "b", "a", "c", "t", 3)
+    assert plex_sync.calculate_media_hash(1, 2, "a", None, None, "t", 3) != \
+        plex_sync.calculate_media_hash(1, 2, None, "a", None, "t", 3)
+
+
+def test_media_hash_handles_none():
+    """Missing values hash like their zero/empty counterparts."""
+    assert plex_sync.calculate_media_hash(None, None, None, None, None, None, None) == \
+        plex_sync.calculate_media_hash(0, 0, "", "", "", "", 0)
+
+
+def sql_value(expression_builder, value):
+    """Evaluate a sql_human_* expression for one value in SQLite."""
+    return sqlite3.connect(":memory:").execute(
+        f"SELECT {expression_builder('v')} FROM (SELECT ? AS v)", (value,)
+    ).fetchone()[0]
+
+
+@pytest.mark.parametrize("size_bytes", [
+    0, 1, 4_999, 5_000, 15_000, 125_000, 999_999, 1_000_000, 1_005_000,
+    994_999_999, 995_000_000, 999_999_999, 1_000_000_000, 1_125_000_000, 5_368_709_120,
+    999_994_999_999, 999_999_999_999, 1_000_000_000_000, 2_505_000_000_000,
+])
+def test_sql_human_size_matches_python(size_bytes):
+    assert sql_value(plex_sync.sql_human_size, size_bytes) == plex_sync.human_readable_size(size_bytes)
+
+
+@pytest.mark.parametrize("milliseconds", [
+    0, 999, 1_000, 29_999, 30_000, 89_999, 90_000, 149_999, 150_000,
+    209_999, 210_000, 7_200_000, 7_229_999, 7_230_000, 7_290_000,
+])
+def test_sql_human_duration_matches_python(milliseconds):
+    assert sql_value(plex_sync.sql_human_duration, milliseconds) == plex_sync.human_readable_duration(milliseconds)
+
+
+def test_generated_columns_for_missing_values(conn):
+    """A zero or NULL duration has no display value; a NULL size shows as zero."""
+    with plex_sync.transaction(conn):
+        conn.execute("INSERT INTO movies (ratingKey, title, duration, sizeBytes) VALUES (1, 'Zero', 0, 0)")
+        conn.execute("INSERT INTO movies (ratingKey, title, duration, sizeBytes) VALUES (2, 'Null', NULL, NULL)")
+    assert conn.execute("SELECT durationHuman, sizeHuman FROM movies ORDER BY ratingKey").fetchall() == [
+        (None, "0.00 MB"), (None, "0.00 MB")
+    ]
+
+
+# --- Thumbnails -----------------------------------------------------------
+
+class FakeSession:
+    """Stands in for _SESSION, serving one PNG and recording the URLs requested."""
+
+    def __init__(self):
+        self.requested = []
+        png = io.BytesIO()
+        plex_sync.Image.new("RGB", (4, 4), "red").save(png, "PNG")
+        self.png = png.getvalue()
+
+    def get(self, url, **kwargs):
+        self.requested.append(url)
+        raw = io.BufferedReader(io.BytesIO(self.png))
+        response = SimpleNamespace(status_code=200, raw=SimpleNamespace(
+            read=raw.read, seek=raw.seek, tell=raw.tell, decode_content=False
+        ))
+        return contextlib.nullcontext(response)
+
+
+@pytest.fixture
+def session(monkeypatch):
+    fake = FakeSession()
+    monkeypatch.setattr(plex_sync, "_SESSION", fake)
+    return fake
+
+
+def thumbnail_item(updated_at):
+    return fake_item(1, "Movie", thumb="/library/metadata/1/thumb/1", updatedAt=updated_at)
+
+
+def test_thumbnail_newer_than_item_is_not_downloaded(tmp_path, session):
+    output_path = tmp_path / "1.thumb.webp"
+    output_path.write_bytes(b"cached")
+    item = thumbnail_item(datetime.fromtimestamp(output_path.stat().st_mtime) - timedelta(hours=1))
+
+    assert plex_sync.image_up_to_date(item, str(output_path))
+    assert plex_sync.download_and_convert_image(item, str(output_path), FAKE_SERVER)
+    assert session.requested == []
+    assert output_path.read_bytes() == b"cached"
+
+
+def test_item_newer_than_thumbnail_is_downloaded(tmp_path, session):
+    output_path = tmp_path / "1.thumb.webp"
+    output_path.write_bytes(b"cached")
+    item = thumbnail_item(datetime.fromtimestamp(output_path.stat().st_mtime) + timedelta(hours=1))
+
+    assert not plex_sync.image_up_to_date(item, str(output_path))
+    assert plex_sync.download_and_convert_image(item, str(output_path), FAKE_SERVER)
+    assert len(session.requested) == 1
+    assert output_path.read_bytes()[8:12] == b"WEBP"
+
+
+def test_missing_thumbnail_is_downloaded(tmp_path, session):
+    output_path = tmp_path / "1.thumb.webp"
+    assert plex_sync.download_and_convert_image(thumbnail_item(datetime.now()), str(output_path), FAKE_SERVER)
+    assert len(session.requested) == 1
+
+# --- Schema migrations and search index -----------------------------------
+
+def fts_integrity_check(conn):
+    """Raises sqlite3.DatabaseError if search_fts disagrees with its source tables."""
+    conn.execute("INSERT INTO search_fts(search_fts) VALUES ('integrity-check')")
+
+
+def search(conn, query):
+    return [row[0] for row in conn.execute(
+        "SELECT title FROM search_fts WHERE search_fts MATCH ? ORDER BY title", (query,)
+    )]
+
+
+def test_migrate_baseline_database(tmp_path):
+    """A version 0 database is migrated to SCHEMA_VERSION with its data intact."""
+    db_path = str(tmp_path / "plex_collection.db")
+    baseline = sqlite3.connect(db_path)
+    baseline.executescript(BASELINE_DDL)
+    baseline.execute(
+        "INSERT INTO movies (ratingKey, title, duration, durationHuman, sizeBytes, sizeHuman) "
+        "VALUES (1, 'Batman', 7200000, 'stale', 5368709120, 'stale')"
+    )
+    baseline.execute("INSERT INTO artists (ratingKey, artistName, totalSizeBytes) VALUES (2, 'Blur', 1048576)")
+    baseline.commit()
+    baseline.close()
+
+    assert plex_sync.init_database(db_path) is False
+
+    conn = plex_sync.open_connection(db_path)
+    try:
+        assert plex_sync.get_schema_version(conn) == plex_sync.SCHEMA_VERSION
+        # Every *Human column is now a VIRTUAL generated column (table_xinfo hidden = 2)
+        for table_name, columns in plex_sync.GENERATED_HUMAN_COLUMNS.items():
+            hidden = {row[1]: row[6] for row in conn.execute(f"PRAGMA table_xinfo({table_name})")}
+            for column_name, _ in columns:
+                assert hidden[column_name] == 2, f"{table_name}.{column_name}"
+        assert conn.execute("SELECT durationHuman, sizeHuman FROM movies").fetchone() == (
+            plex_sync.human_readable_duration(7200000), plex_sync.human_readable_size(5368709120)
+        )
+        assert conn.execute("SELECT totalSizeHuman FROM artists").fetchone()[0] == (
+            plex_sync.human_readable_size(1048576)
+        )
+        fts_integrity_check(conn)
+        assert search(conn, "Batman") == ["Batman"]
+        assert search(conn, "Blur") == ["Blur"]
+    finally:
+        conn.close()
+
+
+def test_upsert_keeps_search_index_in_sync(conn):
+    """Inserts, renames and removals reach search_fts through its triggers."""
+    plex_sync.create_indexes(conn)
+    plex_sync.process_movies(fake_library([fake_movie(1, "Alien"), fake_movie(2, "Heat")]), FAKE_SERVER, conn)
+    assert search(conn, "Alien") == ["Alien"]
+
+    plex_sync.process_movies(fake_library([fake_movie(1, "Blade Runner")]), FAKE_SERVER, conn)
+    fts_integrity_check(conn)
+    assert search(conn, "Alien") == []
+    assert search(conn, "Runner") == ["Blade Runner"]
+    # Removed items stay indexed, flagged unavailable for the backend to filter
+    assert conn.execute(
+        "SELECT available FROM search_fts WHERE search_fts MATCH 'Heat'"
+    ).fetchone()[0] == 0
+
+
+# --- TV rollup ------------------------------------------------------------
+
+def test_rollup_totals(conn):
+    """Season and show totals are summed from their available episodes."""
+    plex_sync.process_tvshows(fake_library([fake_show(100, [[1000, 2000], [4000]])]), FAKE_SERVER, conn)
+
+    seasons = conn.execute(
+        "SELECT seasonTotalEpisode, seasonSizeBytes, seasonSizeHuman, avgSeasonEpisodeDuration "
+        "FROM seasons ORDER BY seasonNumber"
+    ).fetchall()
+    assert seasons == [
+        (2, 3000, plex_sync.human_readable_size(3000), 60000),
+        (1, 4000, plex_sync.human_readable_size(4000), 60000),
+    ]
+    assert conn.execute(
+        "SELECT showTotalEpisode, showSizeBytes, avgEpisodeDuration FROM tv_shows"
+    ).fetchone() == (3, 7000, 60000)
+
+    # Dropping an episode from Plex takes it out of the totals on the next sync
+    plex_sync.process_tvshows(fake_library([fake_show(100, [[1000], [4000]])]), FAKE_SERVER, conn)
+    assert conn.execute(
+        "SELECT seasonTotalEpisode, seasonSizeBytes FROM seasons ORDER BY seasonNumber"
+    ).fetchall() == [(1, 1000), (1, 4000)]
+    assert conn.execute("SELECT showTotalEpisode, showSizeBytes FROM tv_shows").fetchone() == (2, 5000)
+
+
+def test_sequential_episode_image_counts(conn, monkeypatch, caplog):
+    """Episode thumbnails fetched inside process_season are counted in the summary."""
+    monkeypatch.setattr(plex_sync, "DOWNLOAD_IMAGES", True)
+    monkeypatch.setattr(plex_sync, "USE_PARALLEL", False)
+    monkeypatch.setattr(plex_sync, "download_and_convert_image", lambda item, path, server: True)
+    caplog.set_level("INFO", logger=plex_sync.logger.name)
+
+    plex_sync.process_tvshows(fake_library([fake_show(100, [[1000, 2000], [4000]])]), FAKE_SERVER, conn)
+    assert "Episode images: 3 downloaded, 0 failed" in caplog.text
+
+
+# --- Music ----------------------------------------------------------------
+
+@pytest.mark.parametrize("download_images", [False, True])
+def test_music_artist_totals_and_album_thumbnails(conn, monkeypatch, download_images):
+    """Artist totals span all albums, and every album's thumbnail is queued once."""
+    queued = []
+    def download_images_parallel(image_tasks, max_workers=10):
+        queued.extend(image_tasks)
+        return {'downloaded': len(image_tasks), 'failed': 0}
+    monkeypatch.setattr(plex_sync, "DOWNLOAD_IMAGES", download_images)
+    monkeypatch.setattr(plex_sync, "USE_PARALLEL", True)
+    monkeypatch.setattr(plex_sync, "download_images_parallel", download_images_parallel)
+
+    artists = [fake_artist(1000, [[100, 200], [300]]), fake_artist(2000, [[50]])]
+    plex_sync.process_music(fake_library(artists), FAKE_SERVER, conn)
+
+    assert conn.execute(
+        "SELECT ratingKey, totalAlbums, totalTracks, totalSizeBytes FROM artists ORDER BY ratingKey"
+    ).fetchall() == [(1000, 2, 3, 600), (2000, 1, 1, 50)]
+    if download_images:
+        queued_keys = sorted(item.ratingKey for item, _, _ in queued)
+        assert queued_keys == [1000, 1100, 1200, 2000, 2100]
+    else:
+        assert queued == []
+
+# --- main -----------------------------------------------------------------
+
+@pytest.fixture
+def run_main(tmp_path, monkeypatch):
+    """Run main() against a fake Plex server whose libraries are given by name."""
+    def run(libraries):
+        server = SimpleNamespace(
+            url=FAKE_SERVER.url,
+            library=SimpleNamespace(section=libraries.__getitem__)
+        )
+        monkeypatch.setattr(plex_sync, "PlexServer", lambda *args, **kwargs: server)
+        monkeypatch.setattr(plex_sync, "PLEX_URL", "http://plex")
+        monkeypatch.setattr(plex_sync, "PLEX_TOKEN", "token")
+        monkeypatch.setattr(plex_sync, "DB_PATH", str(tmp_path / "plex_collection.db"))
+        monkeypatch.setattr(plex_sync, "LIBRARY_NAMES", list(libraries))
+        monkeypatch.setattr(plex_sync, "IMAGE_FOLDERS", {})
+        monkeypatch.setattr(plex_sync, "USE_PARALLEL", plex_sync.USE_PARALLEL)
+        monkeypatch.setattr(sys, "argv", ["plex_sync.py", "--no-images"])
+        # Skip the retry backoff
+        monkeypatch.setattr(plex_sync.time, "sleep", lambda seconds: None)
+        return plex_sync.main()
+    return run
+
+
+def test_main_succeeds(run_main):
+    assert run_main({"Movies": fake_library([fake_movie(1)])}) == 0
+
+
+def test_main_fails_when_a_listing_fails(run_main):
+    """A library Plex can't list makes the run exit non-zero."""
+    def unreachable(**kwargs):
+        raise requests.exceptions.ConnectionError("unreachable")
+    movies = fake_library([fake_movie(1)])
+    movies.search = unreachable
+    assert run_main({"Movies": movies, "TV Shows": fake_library([])}) == 1